@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the AppSync GraphQL endpoint, used by the benchmarks
+
+Answers create mutations (single and aliased batches) after a configurable
+latency, echoing the input back with a generated ID.
+
+Usage:
+    python benchmarks/appsync_stub.py --port 8765 --latency-ms 50
+"""
+
+import argparse
+import itertools
+import json
+import re
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+ALIAS_PATTERN = re.compile(r"(r\d+)\s*:\s*create\w+\s*\(\s*input\s*:\s*\$(input\d+)")
+
+
+class AppSyncStubHandler(BaseHTTPRequestHandler):
+    """Handle GraphQL POSTs like a minimal AppSync API"""
+
+    protocol_version = 'HTTP/1.1'
+    latency = 0.0
+    ids = itertools.count(1)
+    requests = 0
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        if self.latency:
+            time.sleep(self.latency)
+
+        with AppSyncStubHandler.lock:
+            AppSyncStubHandler.requests += 1
+
+        query = body.get('query', '')
+        variables = body.get('variables') or {}
+        aliases = ALIAS_PATTERN.findall(query)
+        if aliases:
+            data = {alias: self._created(variables.get(var)) for alias, var in aliases}
+        else:
+            data = {'createRecord': self._created(variables.get('input'))}
+
+        payload = json.dumps({'data': data}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _created(self, record):
+        return {'id': f"stub-{next(self.ids)}", **(record or {})}
+
+
+def start_stub(port: int = 0, latency_ms: float = 0.0) -> ThreadingHTTPServer:
+    """Start the stub in a background thread and return the server"""
+    AppSyncStubHandler.latency = latency_ms / 1000.0
+    server = ThreadingHTTPServer(('127.0.0.1', port), AppSyncStubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local AppSync GraphQL stub")
+    parser.add_argument('--port', type=int, default=8765, help="Port to listen on (default: 8765)")
+    parser.add_argument('--latency-ms', type=float, default=50.0, help="Delay per request in ms (default: 50)")
+    args = parser.parse_args()
+
+    AppSyncStubHandler.latency = args.latency_ms / 1000.0
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), AppSyncStubHandler)
+    print(f"🧪 AppSync stub listening on http://127.0.0.1:{args.port}/ ({args.latency_ms:g} ms latency)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Foreman CLI pipeline stage by stage
+
+Generates synthetic customer and project CSVs, then times the same stages
+main.py runs (header read + model detection, CSV read, map_fields,
+validation and GraphQL submission against a local AppSync stub). Results
+are written as JSON so rows/sec and peak memory can be compared between
+releases.
+
+Usage:
+    python benchmarks/bench_pipeline.py --rows 10000 100000 1000000 --output bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.registry import ModelRegistry
+from appsync_stub import start_stub
+
+GENERATE_CHUNK = 500_000
+
+
+def _customer_frame(start: int, count: int, rng: np.random.Generator) -> pd.DataFrame:
+    ids = np.arange(start, start + count)
+    text_ids = ids.astype(str)
+    phones = rng.integers(2_000_000_000, 9_999_999_999, size=count).astype(str)
+    days = rng.integers(0, 3650, size=count)
+    frame = pd.DataFrame({
+        'full_name': np.char.add('Customer ', text_ids),
+        'customerEmail': np.char.add(np.char.add('user', text_ids), '@example.com'),
+        'phone': phones,
+        'companyName': np.char.add('Company ', (ids % 997).astype(str)),
+        'joined_on': (pd.Timestamp('2015-01-01') + pd.to_timedelta(days, unit='D')).strftime('%Y-%m-%d'),
+        'position': 'Engineer',
+        'location': 'Miami',
+        'department': 'Operations',
+        'employee_id': np.char.add('EMP', text_ids),
+    })
+    # Sprinkle in invalid rows so validation does real work
+    frame.loc[ids % 50 == 0, 'customerEmail'] = 'not-an-email'
+    return frame
+
+
+def _project_frame(start: int, count: int, rng: np.random.Generator) -> pd.DataFrame:
+    ids = np.arange(start, start + count)
+    text_ids = ids.astype(str)
+    starts = pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 1500, size=count), unit='D')
+    ends = starts + pd.to_timedelta(rng.integers(-30, 365, size=count), unit='D')
+    return pd.DataFrame({
+        'project_name': np.char.add('Project ', text_ids),
+        'project_description': 'Synthetic benchmark project',
+        'start_date': starts.strftime('%Y-%m-%d'),
+        'end_date': ends.strftime('%Y-%m-%d'),
+        'project_status': np.where(ids % 3 == 0, 'active', 'planned'),
+        'project_budget': rng.integers(1_000, 5_000_000, size=count).astype(str),
+        'customer_id': np.char.add('customer_', (ids % 10_000).astype(str)),
+    })
+
+
+GENERATORS = {
+    'customer': _customer_frame,
+    'project': _project_frame,
+}
+
+
+def generate_csv(kind: str, rows: int, data_dir: str, seed: int = 42) -> str:
+    """Write a synthetic CSV in bounded chunks, reusing it if already generated"""
+    path = os.path.join(data_dir, f"{kind}_{rows}.csv")
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(data_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    tmp_path = f"{path}.tmp"
+    for start in range(0, rows, GENERATE_CHUNK):
+        frame = GENERATORS[kind](start, min(GENERATE_CHUNK, rows - start), rng)
+        frame.to_csv(tmp_path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+class StageTimer:
+    """Collect wall time and peak traced memory for each pipeline stage"""
+
+    def __init__(self, track_memory: bool = True):
+        self.track_memory = track_memory
+        self.stages = []
+
+    def run(self, name: str, rows: int, func, *args, **kwargs):
+        if self.track_memory:
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        seconds = time.perf_counter() - started
+        stage = {
+            'stage': name,
+            'rows': rows,
+            'seconds': round(seconds, 6),
+            'rows_per_sec': round(rows / seconds, 1) if seconds > 0 else None,
+        }
+        if self.track_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            stage['peak_mb'] = round((peak - baseline) / 1024 / 1024, 2)
+        self.stages.append(stage)
+        return result
+
+
+def bench_file(kind: str, path: str, rows: int, args) -> dict:
+    """Run every pipeline stage over one file"""
+    timer = StageTimer(track_memory=not args.no_memory)
+    registry = ModelRegistry()
+
+    header = timer.run('read_header', rows, registry.read_header, path)
+    is_valid, model, message = timer.run('detect_model', rows, registry.validate_csv, header)
+    if not is_valid or model.name != kind:
+        raise RuntimeError(f"Detection failed for {path}: {message}")
+
+    usecols = model.get_source_columns(header)
+    df = timer.run('read_csv', rows, pd.read_csv, path, usecols=usecols)
+    mapped_df = timer.run('map_fields', rows, model.map_fields, df)
+    _, row_errors = timer.run('validate_frame', rows, model.validate_frame, mapped_df)
+    del df
+
+    submitted = {}
+    if args.submit_rows:
+        from gql_client import GraphQLClient
+
+        client = GraphQLClient(max_connections=args.concurrency, max_retries=args.max_retries)
+        sample = mapped_df.head(args.submit_rows)
+        valid_rows = [row for idx, row in sample.iterrows() if idx not in row_errors]
+
+        def submit():
+            return sum(1 for success, _ in client.submit_records(
+                model, valid_rows, args.concurrency, args.batch_size) if success)
+
+        submitted['successful'] = timer.run('submit', len(valid_rows), submit)
+        submitted.update(client.throttle.summary())
+
+    return {
+        'model': kind,
+        'rows': rows,
+        'file_bytes': os.path.getsize(path),
+        'source_columns': len(usecols),
+        'csv_columns': len(header),
+        'invalid_rows': len(row_errors),
+        'stages': timer.stages,
+        'submission': submitted,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="📏 Foreman CLI pipeline benchmarks")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help="Row counts to benchmark (default: 10000 100000 1000000; up to 10M supported)")
+    parser.add_argument('--models', nargs='+', choices=sorted(GENERATORS), default=sorted(GENERATORS),
+                        help="Models to generate data for (default: all)")
+    parser.add_argument('--data-dir', default=os.path.join('benchmarks', 'data'),
+                        help="Where generated CSVs are cached (default: benchmarks/data)")
+    parser.add_argument('--latency-ms', type=float, default=50.0, help="Stub latency per request (default: 50)")
+    parser.add_argument('--submit-rows', type=int, default=1_000,
+                        help="Rows per file sent to the stub; 0 skips submission (default: 1000)")
+    parser.add_argument('--concurrency', type=int, default=8, help="Submission concurrency (default: 8)")
+    parser.add_argument('--batch-size', type=int, default=1, help="Rows per batched mutation (default: 1)")
+    parser.add_argument('--max-retries', type=int, default=8, help="Retries per request (default: 8)")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="Skip tracemalloc (faster, but no per-stage peak memory)")
+    parser.add_argument('--output', help="Write JSON results to this file (default: stdout)")
+    args = parser.parse_args()
+
+    server = None
+    if args.submit_rows:
+        server = start_stub(latency_ms=args.latency_ms)
+        os.environ['GRAPHQL_URL'] = f"http://127.0.0.1:{server.server_address[1]}/"
+        os.environ['APPSYNC_API_KEY'] = 'benchmark'
+
+    if not args.no_memory:
+        tracemalloc.start()
+
+    results = []
+    try:
+        for kind in args.models:
+            for rows in args.rows:
+                print(f"⏱️ {kind}: {rows} rows", file=sys.stderr)
+                path = generate_csv(kind, rows, args.data_dir)
+                results.append(bench_file(kind, path, rows, args))
+    finally:
+        if server:
+            server.shutdown()
+
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'settings': {
+            'latency_ms': args.latency_ms,
+            'submit_rows': args.submit_rows,
+            'concurrency': args.concurrency,
+            'batch_size': args.batch_size,
+        },
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'results': results,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+        print(f"📊 Results written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Checkpoint journal for resumable Foreman submissions
+"""
+
+import hashlib
+import os
+from typing import Dict, Optional
+import pandas as pd
+from models.base import BaseModel
+from models.validators import column_text
+
+
+def file_hash(path: str, block_size: int = 1024 * 1024) -> str:
+    """Hash file contents in blocks so large CSVs are never loaded whole"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def key_text(values: pd.Series) -> pd.Series:
+    """Text of each value that does not depend on the column dtype
+    
+    Missing values become '' and whole floats lose their '.0', so a column read
+    as int in one chunk and float (because of a blank) in another hashes alike.
+    """
+    text = column_text(values).where(values.notna(), '')
+    if pd.api.types.is_float_dtype(values):
+        whole = values.notna() & (values % 1 == 0)
+        text[whole] = values[whole].astype('int64').astype(str)
+    return text
+
+
+def row_keys(model: BaseModel, mapped_df: pd.DataFrame) -> pd.Series:
+    """Hash each row's schema fields together with its absolute row number
+    
+    The index of a chunked read continues across chunks, so it is the row
+    number in the file.
+    """
+    fields = [field for field in model.schema if field in mapped_df.columns]
+    text = pd.Series(mapped_df.index.astype(str), index=mapped_df.index, dtype=object)
+    for field in fields:
+        text = text + '\x1f' + key_text(mapped_df[field])
+    return text.map(lambda row: hashlib.sha256(row.encode('utf-8')).hexdigest()[:32])
+
+
+class CheckpointJournal:
+    """Append-only journal of rows confirmed by the GraphQL API
+    
+    One journal file exists per source file hash. Each confirmed row adds a
+    single "<row key> <record id>" line, so a crashed run can be resumed by
+    skipping rows already in the journal. Without resume, an existing journal
+    is rotated to "<hash>.journal.prev" and a fresh one is started.
+    """
+    
+    def __init__(self, directory: str, source_hash: str, resume: bool = True):
+        self.path = os.path.join(directory, f"{source_hash}.journal")
+        self.confirmed: Dict[str, str] = {}
+        
+        os.makedirs(directory, exist_ok=True)
+        if not resume and os.path.exists(self.path):
+            os.replace(self.path, self.path + '.prev')
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    key, _, record_id = line.rstrip('\n').partition(' ')
+                    if key:
+                        self.confirmed[key] = record_id
+        
+        # Line buffered: every confirmation reaches the OS before the next row
+        self._file = open(self.path, 'a', buffering=1, encoding='utf-8')
+    
+    def is_confirmed(self, key: str) -> bool:
+        """Check whether a row was already confirmed by a previous run"""
+        return key in self.confirmed
+    
+    def get_record_id(self, key: str) -> Optional[str]:
+        """Get the record ID returned when the row was confirmed"""
+        return self.confirmed.get(key)
+    
+    def record(self, key: str, record_id: Optional[str]):
+        """Append a confirmed row to the journal"""
+        record_id = str(record_id or '')
+        self.confirmed[key] = record_id
+        self._file.write(f"{key} {record_id}\n")
+    
+    def close(self):
+        """Close the journal file"""
+        self._file.close()
@@ -1,42 +1,56 @@
 #!/usr/bin/env python3
 """
-AWS Glue Job for CSV Processing with Pandas
+AWS Glue Job for CSV Processing with Pandas or Spark
 Foreman Data Onboarding Platform
 """
 
 import sys
+import io
 import json
 import boto3
 import pandas as pd
 import hashlib
+import random
+import re
+import threading
+import time
 import uuid
-from datetime import datetime
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from awsglue.utils import getResolvedOptions
 from awsglue.context import GlueContext
 from awsglue.job import Job
 from pyspark.context import SparkContext
 from pyspark.sql import SparkSession
 
-# Get job parameters
+# Get job parameters. Optional ones:
+#   --processing_mode  pandas (default) or spark
+#   --s3_keys          comma-separated object keys to process
+#   --manifest_key     object listing the keys to process (JSON list or one per line)
+#   --s3_prefix        process every CSV under this prefix
+#   --file_workers     files processed in parallel (default 4)
+#   --parquet_prefix   where the Parquet copy is written (default curated/customers/)
+OPTIONAL_ARGS = ['processing_mode', 's3_keys', 'manifest_key', 's3_prefix', 'file_workers', 'parquet_prefix']
+optional_args = [name for name in OPTIONAL_ARGS + ['JOB_RUN_ID'] if f"--{name}" in sys.argv]
 args = getResolvedOptions(sys.argv, [
     'JOB_NAME'
-])
+] + optional_args)
+processing_mode = args.get('processing_mode', 'pandas').lower()
+PROCESSING_MODES = ('pandas', 'spark')
+if processing_mode not in PROCESSING_MODES:
+    raise ValueError(f"Unknown --processing_mode '{processing_mode}' (expected one of: {', '.join(PROCESSING_MODES)})")
+file_workers = int(args.get('file_workers', 4))
+parquet_prefix = args.get('parquet_prefix', 'curated/customers/').rstrip('/') + '/'
 
-# Auto-detect the most recent file in the bucket
 s3_bucket = 'foreman-dev-csv-uploads'
-job_run_id = f"glue-job-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
-
-# List files in the bucket and process the most recent one
-s3_client = boto3.client('s3')
-response = s3_client.list_objects_v2(Bucket=s3_bucket, MaxKeys=10)
-if 'Contents' in response:
-    # Get the most recent file
-    files = sorted(response['Contents'], key=lambda x: x['LastModified'], reverse=True)
-    s3_key = files[0]['Key']
-    print(f"📁 Processing most recent file: {s3_key}")
-else:
-    print("❌ No files found in bucket")
-    sys.exit(1)
+customers_table_name = 'foreman-dev-customers'
+file_registry_table_name = 'foreman-dev-file-registry'
+# Glue passes the run's own JobRunId, which the web API stores for each upload;
+# runs started outside Glue get a unique ID instead
+job_run_id = args.get('JOB_RUN_ID') or f"glue-job-{uuid.uuid4()}"
 
 # Initialize Spark and Glue context
 sc = SparkContext()
@@ -45,142 +59,1030 @@ spark = glueContext.spark_session
 job = Job(glueContext)
 job.init(args['JOB_NAME'], args)
 
-def process_csv_with_pandas():
-    """Process CSV file using pandas for data validation and transformation"""
+# Prefixes the job moves finished files into; never picked up as input
+OUTPUT_PREFIXES = ('processed/', 'failed/', parquet_prefix)
+
+# Columns of the Parquet copy; ingest_date, source_file and file_hash are partitions
+PARQUET_COLUMNS = ['id', 'name', 'email', 'phone', 'signupDate', 'job_run_id', 'processed_at']
+
+EMAIL_COLUMNS = ['email', 'email_address', 'Email', 'Email Address']
+NAME_COLUMNS = ['name', 'full_name', 'Name', 'Full Name']
+PHONE_COLUMNS = ['phone', 'phone_number', 'Phone', 'Phone Number']
+DATE_COLUMNS = ['signupDate', 'hire_date', 'Signup Date', 'Hire Date']
+
+# Spark mode collects at most this many row errors back to the driver
+SPARK_ERROR_SAMPLE = 1000
+
+# Customer IDs are this many hex digits of the SHA-256 of the normalized email
+CUSTOMER_ID_DIGITS = 32
+
+# Objects larger than this are read with parallel ranged GETs of S3_PART_SIZE
+S3_RANGED_GET_THRESHOLD = 64 * 1024 * 1024
+S3_PART_SIZE = 8 * 1024 * 1024
+S3_READ_WORKERS = 8
+
+# Up to this many unchecked emails are looked up with EmailIndex queries;
+# a larger lookup loads every existing email, once per run, with one
+# parallel index scan
+EMAIL_QUERY_LIMIT = 2000
+EMAIL_LOOKUP_WORKERS = 16
+EMAIL_SCAN_SEGMENTS = 8
+
+# Spark mode reads the customers table with this many parallel scan splits
+SPARK_SCAN_SPLITS = 32
+SPARK_SCAN_READ_PERCENT = '0.5'
+
+
+def customer_id(email):
+    """Stable customer ID derived from the normalized email
     
-    print(f"🚀 Starting Glue job: {job_run_id}")
-    print(f"📁 Processing file: s3://{s3_bucket}/{s3_key}")
+    Retried or overlapping runs produce the same ID for the same customer,
+    so writes are idempotent upserts. Spark mode computes it with sha2().
+    """
+    return f"customer_{hashlib.sha256(email.encode('utf-8')).hexdigest()[:CUSTOMER_ID_DIGITS]}"
+
+
+def remember_email(existing, email, file_hash):
+    """Record which file stored an email; one stored by several files maps to None"""
+    existing[email] = file_hash if existing.get(email, file_hash) == file_hash else None
+
+
+def load_existing_emails(dynamodb_client, candidates=None):
+    """Build an in-memory map of emails that already exist in the customers table
+    
+    Each email maps to the file_hash of the file that stored it. Small files
+    query EmailIndex once per distinct email in parallel; large files (or
+    candidates=None) read the whole index once with a segmented parallel
+    scan. Either way each row's duplicate check becomes a local lookup.
+    """
+    if candidates is not None and not candidates:
+        return {}
+    
+    projection = {
+        'ProjectionExpression': '#email, #file_hash',
+        'ExpressionAttributeNames': {'#email': 'email', '#file_hash': 'file_hash'}
+    }
+    
+    if candidates is not None and len(candidates) <= EMAIL_QUERY_LIMIT:
+        def stored_items(email):
+            response = dynamodb_client.query(
+                TableName=customers_table_name,
+                IndexName='EmailIndex',
+                KeyConditionExpression='#email = :email',
+                ExpressionAttributeValues={':email': {'S': email}},
+                **projection
+            )
+            return email, response['Items']
+        
+        existing = {}
+        with ThreadPoolExecutor(max_workers=EMAIL_LOOKUP_WORKERS) as executor:
+            for email, items in executor.map(stored_items, candidates):
+                for item in items:
+                    remember_email(existing, email, item.get('file_hash', {}).get('S'))
+        return existing
+    
+    def scan_segment(segment):
+        items = []
+        kwargs = {
+            'TableName': customers_table_name,
+            'IndexName': 'EmailIndex',
+            'Segment': segment,
+            'TotalSegments': EMAIL_SCAN_SEGMENTS,
+            **projection
+        }
+        while True:
+            response = dynamodb_client.scan(**kwargs)
+            items.extend(item for item in response['Items'] if 'email' in item)
+            if 'LastEvaluatedKey' not in response:
+                return items
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    existing = {}
+    with ThreadPoolExecutor(max_workers=EMAIL_SCAN_SEGMENTS) as executor:
+        for items in executor.map(scan_segment, range(EMAIL_SCAN_SEGMENTS)):
+            for item in items:
+                remember_email(existing, item['email']['S'], item.get('file_hash', {}).get('S'))
+    return existing
+
+
+def existing_emails_frame():
+    """Emails already in the customers table as a Spark DataFrame
+    
+    The table is scanned by the executors through the Glue DynamoDB
+    connector, so existing emails never pass through the driver. Like
+    load_existing_emails, stored_hash is the file_hash of the file that
+    stored the email, or null if several files (or none) did.
+    """
+    from pyspark.sql import functions as F
+    
+    existing = glueContext.create_dynamic_frame.from_options(
+        connection_type='dynamodb',
+        connection_options={
+            'dynamodb.input.tableName': customers_table_name,
+            'dynamodb.splits': str(SPARK_SCAN_SPLITS),
+            'dynamodb.throughput.read.percent': SPARK_SCAN_READ_PERCENT
+        }
+    ).toDF()
+    if 'email' not in existing.columns:
+        return spark.createDataFrame([], 'email string, stored_hash string')
+    file_hash = F.col('file_hash').cast('string') if 'file_hash' in existing.columns else F.lit(None).cast('string')
+    return existing.select(F.col('email').cast('string').alias('email'), file_hash.alias('file_hash')) \
+        .where(F.col('email').isNotNull()) \
+        .groupBy('email') \
+        .agg(F.when((F.min('file_hash') == F.max('file_hash')) & (F.count('*') == F.count('file_hash')),
+                    F.min('file_hash')).alias('stored_hash'))
+
+
+class ExistingEmails:
+    """Emails already in the customers table, shared by every file of a run
+    
+    Maps each email to the file_hash that stored it, like load_existing_emails.
+    Small lookups only query emails no earlier file checked; the first large
+    one scans the index once for the rest of the run. Files add the emails
+    they wrote, so later files see them without another read. Spark mode
+    shares one connector scan the same way.
+    """
+    
+    def __init__(self, dynamodb_client):
+        self.client = dynamodb_client
+        self.lock = threading.Lock()
+        self.stored = {}
+        self.checked = set()
+        self.loaded = False
+        self.spark_frame = None
+    
+    def lookup(self, candidates):
+        """The stored file_hash of each candidate email that already exists"""
+        with self.lock:
+            unchecked = set() if self.loaded else set(candidates) - self.checked
+            if len(unchecked) > EMAIL_QUERY_LIMIT:
+                self._merge(load_existing_emails(self.client))
+                self.loaded = True
+            elif unchecked:
+                self._merge(load_existing_emails(self.client, unchecked))
+                self.checked.update(unchecked)
+            return {email: self.stored[email] for email in candidates if email in self.stored}
+    
+    def add(self, emails, file_hash):
+        """Record emails a file of this run wrote"""
+        with self.lock:
+            self._merge({email: file_hash for email in emails})
+            self.checked.update(emails)
+    
+    def _merge(self, stored):
+        for email, file_hash in stored.items():
+            remember_email(self.stored, email, file_hash)
+    
+    def frame(self):
+        """Spark DataFrame of (email, stored_hash), scanned once per run"""
+        with self.lock:
+            return self._frame()
+    
+    def add_frame(self, emails, file_hash):
+        """Record the email column of a Spark frame a file of this run wrote"""
+        from pyspark.sql import functions as F
+        
+        written = emails.select('email', F.lit(file_hash).alias('stored_hash'))
+        with self.lock:
+            merged = self._frame().unionByName(written).groupBy('email').agg(
+                F.when((F.min('stored_hash') == F.max('stored_hash')) &
+                       (F.count('*') == F.count('stored_hash')), F.min('stored_hash')).alias('stored_hash'))
+            # Materialize the emails so the frame does not keep the file's lineage
+            self.spark_frame = merged.localCheckpoint()
+    
+    def _frame(self):
+        # Called with the lock held
+        if self.spark_frame is None:
+            self.spark_frame = existing_emails_frame().cache()
+        return self.spark_frame
+
+
+# Leases and claims last this long unless renewed; one that was not renewed
+# in time is treated as abandoned by a dead run
+FILE_CLAIM_TIMEOUT = timedelta(minutes=15)
+LEASE_RENEW_SECONDS = 300
+
+# Progress is written to the file's registry item this often (rows or seconds)
+PROGRESS_EVERY_ROWS = 10000
+PROGRESS_EVERY_SECONDS = 5.0
+
+
+def resolve_input_keys(s3_client):
+    """List the object keys this run should process
+    
+    Keys come from --s3_keys, a --manifest_key object or an --s3_prefix
+    listing; without any of them the most recent upload is processed.
+    """
+    if 's3_keys' in args:
+        keys = [key.strip() for key in args['s3_keys'].split(',')]
+    elif 'manifest_key' in args:
+        body = s3_client.get_object(Bucket=s3_bucket, Key=args['manifest_key'])['Body'].read().decode('utf-8')
+        try:
+            manifest = json.loads(body)
+            keys = manifest['keys'] if isinstance(manifest, dict) else manifest
+        except ValueError:
+            keys = body.splitlines()
+        keys = [key.strip() for key in keys]
+    else:
+        objects = []
+        paginator = s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=s3_bucket, Prefix=args.get('s3_prefix', '')):
+            objects.extend(obj for obj in page.get('Contents', [])
+                           if obj['Key'].lower().endswith('.csv') and not obj['Key'].startswith(OUTPUT_PREFIXES))
+        objects.sort(key=lambda obj: obj['LastModified'], reverse=True)
+        if 's3_prefix' not in args:
+            objects = objects[:1]
+        keys = [obj['Key'] for obj in objects]
+    
+    # Keep the first occurrence of each key, in order
+    return list(dict.fromkeys(key for key in keys if key))
+
+
+def lease_object(registry, s3_key, etag):
+    """Lease an S3 object for this run with a conditional write
+    
+    A lease can be taken when nobody holds one, when a processing lease has
+    expired, when the web API queued a new upload of the key, or when the
+    object finished with a failure or was replaced by new content (a
+    different ETag) since it completed.
+    """
+    now = datetime.now()
+    try:
+        registry.put_item(
+            Item={
+                'id': f"object#{s3_key}",
+                'source_file': s3_key,
+                'etag': etag,
+                'job_run_id': job_run_id,
+                'status': 'processing',
+                'leased_at': now.isoformat(),
+                'lease_expires_at': (now + FILE_CLAIM_TIMEOUT).isoformat()
+            },
+            ConditionExpression=('attribute_not_exists(id) OR '
+                                 '(#status = :processing AND lease_expires_at < :now) OR '
+                                 '(#status <> :processing AND (#status IN (:failed, :queued) OR etag <> :etag))'),
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={
+                ':now': now.isoformat(),
+                ':processing': 'processing',
+                ':failed': 'failed',
+                ':queued': 'queued',
+                ':etag': etag
+            }
+        )
+        return True
+    except registry.meta.client.exceptions.ConditionalCheckFailedException:
+        return False
+
+
+def update_registry_item(registry, item_id, status, **details):
+    """Set the final status of a registry item this run owns"""
+    details.update({'status': status, 'finished_at': datetime.now().isoformat()})
+    names = {f"#{k}": k for k in details}
+    registry.update_item(
+        Key={'id': item_id},
+        UpdateExpression='SET ' + ', '.join(f"#{k} = :{k}" for k in details),
+        ConditionExpression='job_run_id = :job_run_id',
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues={**{f":{k}": v for k, v in details.items()}, ':job_run_id': job_run_id}
+    )
+
+
+def claim_file(registry, file_hash, source_file):
+    """Claim a file hash for this run with a conditional write
+    
+    Returns (claimed, existing_item). Only one run can hold a claim; failed
+    or abandoned claims can be taken over, completed ones never.
+    """
+    now = datetime.now()
+    key = f"hash#{file_hash}"
+    item = {
+        'id': key,
+        'file_hash': file_hash,
+        'source_file': source_file,
+        'job_run_id': job_run_id,
+        'status': 'processing',
+        'claimed_at': now.isoformat(),
+        'lease_expires_at': (now + FILE_CLAIM_TIMEOUT).isoformat()
+    }
+    conditional_failed = registry.meta.client.exceptions.ConditionalCheckFailedException
     
     try:
-        # Download CSV file from S3
-        s3_client = boto3.client('s3')
-        dynamodb = boto3.resource('dynamodb')
-        table = dynamodb.Table('foreman-dev-customers')
+        registry.put_item(Item=item, ConditionExpression='attribute_not_exists(id)')
+        return True, None
+    except conditional_failed:
+        pass
+    
+    existing = registry.get_item(Key={'id': key}, ConsistentRead=True).get('Item')
+    if existing and existing.get('status') == 'completed':
+        return False, existing
+    
+    # Claims without a lease_expires_at go stale FILE_CLAIM_TIMEOUT after claimed_at
+    try:
+        registry.put_item(
+            Item=item,
+            ConditionExpression=('#status = :failed OR lease_expires_at < :now OR '
+                                 '(attribute_not_exists(lease_expires_at) AND claimed_at < :stale)'),
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={
+                ':failed': 'failed',
+                ':now': now.isoformat(),
+                ':stale': (now - FILE_CLAIM_TIMEOUT).isoformat()
+            }
+        )
+        return True, existing
+    except conditional_failed:
+        return False, existing
+
+
+def release_file_claim(registry, file_hash, status, **details):
+    """Mark this run's claim as completed or failed"""
+    update_registry_item(registry, f"hash#{file_hash}", status, **details)
+
+
+class LeaseHeartbeat:
+    """Keeps this run's leases on registry items alive while a file is processed
+    
+    A daemon thread pushes lease_expires_at forward every LEASE_RENEW_SECONDS
+    for as long as the item is still processing under this run, so long files
+    keep their lease while a dead run's lease still expires quickly. Renewals
+    go through the thread-safe low-level client, not a Table resource.
+    """
+    
+    def __init__(self, dynamodb_client):
+        self.client = dynamodb_client
+        self.serializer = TypeSerializer()
+        self.item_ids = []
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+    
+    def add(self, item_id):
+        """Renew this item's lease from now on"""
+        self.item_ids.append(item_id)
+        if not self.thread.is_alive():
+            self.thread.start()
+    
+    def stop(self):
+        """Stop renewing (the final status update ends the lease)"""
+        self.stopped.set()
+    
+    def _run(self):
+        while not self.stopped.wait(LEASE_RENEW_SECONDS):
+            for item_id in list(self.item_ids):
+                if not self.stopped.is_set():
+                    self.renew(item_id)
+    
+    def renew(self, item_id):
+        """Extend one lease, dropping it if another run has taken the item over"""
+        values = {
+            ':expires': (datetime.now() + FILE_CLAIM_TIMEOUT).isoformat(),
+            ':job_run_id': job_run_id,
+            ':processing': 'processing'
+        }
+        try:
+            self.client.update_item(
+                TableName=file_registry_table_name,
+                Key={'id': {'S': item_id}},
+                UpdateExpression='SET lease_expires_at = :expires',
+                ConditionExpression='job_run_id = :job_run_id AND #status = :processing',
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues={k: self.serializer.serialize(v) for k, v in values.items()}
+            )
+        except self.client.exceptions.ConditionalCheckFailedException:
+            print(f"⚠️ Lost the lease on {item_id}")
+            self.item_ids.remove(item_id)
+        except Exception as e:
+            # A missed renewal is retried on the next beat
+            print(f"⚠️ Could not renew the lease on {item_id}: {str(e)}")
+
+
+class ProgressReporter:
+    """Throttled progress snapshots on a file's object#<key> registry item
+    
+    Counters are kept in memory and written as one compact `progress` map at
+    most every PROGRESS_EVERY_ROWS rows or PROGRESS_EVERY_SECONDS, and on
+    every stage change, so a status check is a single GetItem. Each stage
+    counts progress in one counter, from which throughput and ETA follow.
+    Snapshots are taken under the lock but written after releasing it; a
+    sequence number keeps a slow older write from replacing a newer one.
+    Writer threads report progress too, so writes use the thread-safe
+    low-level client rather than a Table resource.
+    """
+    
+    def __init__(self, dynamodb_client, item_id):
+        self.client = dynamodb_client
+        self.serializer = TypeSerializer()
+        self.item_id = item_id
+        self.lock = threading.Lock()
+        self.counts = {'rows_read': 0, 'rows_written': 0, 'rows_rejected': 0, 'rows_duplicate': 0}
+        self.stage = None
+        self.stage_total = None
+        self.stage_counter = None
+        self.stage_start_value = 0
+        self.stage_started = time.monotonic()
+        self.written_rows = 0
+        self.written_at = 0.0
+        self.sequence = 0
+    
+    def set_stage(self, stage, total=None, counter=None):
+        """Start a stage whose progress is counts[counter] out of total"""
+        with self.lock:
+            self.stage, self.stage_total, self.stage_counter = stage, total, counter
+            self.stage_start_value = self.counts.get(counter, 0)
+            self.stage_started = time.monotonic()
+            progress = self._snapshot()
+        self._write(progress)
+    
+    def update(self, **counts):
+        """Set counters, writing a snapshot if one is due"""
+        with self.lock:
+            self.counts.update(counts)
+            rows = sum(value for key, value in self.counts.items() if key.startswith('rows_'))
+            if (rows - self.written_rows < PROGRESS_EVERY_ROWS
+                    and time.monotonic() - self.written_at < PROGRESS_EVERY_SECONDS):
+                return
+            progress = self._snapshot()
+        self._write(progress)
+    
+    def _snapshot(self):
+        # Called with the lock held
+        now = time.monotonic()
+        self.sequence += 1
+        progress = {**self.counts, 'stage': self.stage, 'updated_at': datetime.now().isoformat(),
+                    'sequence': self.sequence}
+        if self.stage_counter:
+            done = self.counts.get(self.stage_counter, 0)
+            elapsed = now - self.stage_started
+            throughput = (done - self.stage_start_value) / elapsed if elapsed > 0 else 0
+            progress['throughput'] = int(throughput)
+            progress['throughput_unit'] = self.stage_counter
+            if self.stage_total is not None:
+                progress['stage_total'] = self.stage_total
+                if throughput > 0:
+                    progress['eta_seconds'] = int(max(0, self.stage_total - done) / throughput)
         
-        # Download file to local storage
-        local_file = f"/tmp/{s3_key.split('/')[-1]}"
-        s3_client.download_file(s3_bucket, s3_key, local_file)
+        self.written_rows = sum(value for key, value in self.counts.items() if key.startswith('rows_'))
+        self.written_at = now
+        return progress
+    
+    def _write(self, progress):
+        values = {':progress': progress, ':job_run_id': job_run_id, ':sequence': progress['sequence']}
+        try:
+            self.client.update_item(
+                TableName=file_registry_table_name,
+                Key={'id': {'S': self.item_id}},
+                UpdateExpression='SET progress = :progress',
+                ConditionExpression=('job_run_id = :job_run_id AND '
+                                     '(attribute_not_exists(progress) OR progress.#sequence < :sequence)'),
+                ExpressionAttributeNames={'#sequence': 'sequence'},
+                ExpressionAttributeValues={k: self.serializer.serialize(v) for k, v in values.items()}
+            )
+        except self.client.exceptions.ConditionalCheckFailedException:
+            # A newer snapshot was written first, or the item belongs to another run now
+            pass
+        except Exception as e:
+            # Progress is best effort and must never fail the job
+            print(f"⚠️ Could not write progress: {str(e)}")
+
+
+class BatchWriter:
+    """Parallel DynamoDB writer using 25-item BatchWriteItem calls
+    
+    Items are buffered into batches of 25 and written by a pool of threads.
+    UnprocessedItems are retried with jittered exponential backoff; rows that
+    still fail are reported back by row number. on_write, if given, is called
+    with the running total of written items after each batch call.
+    """
+    
+    BATCH_SIZE = 25
+    MAX_RETRIES = 8
+    BASE_DELAY = 0.05
+    MAX_DELAY = 5.0
+    
+    def __init__(self, dynamodb_client, table_name, workers=8, on_write=None):
+        self.client = dynamodb_client
+        self.table_name = table_name
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        # Bound queued batches so memory stays flat on large files
+        self.slots = threading.Semaphore(workers * 4)
+        self.serializer = TypeSerializer()
+        self.lock = threading.Lock()
+        self.buffer = []
+        self.futures = []
+        self.written = 0
+        self.failed_rows = []
+        self.batches = 0
+        self.retries = 0
+        self.on_write = on_write
+        self.started_at = time.monotonic()
+    
+    def add(self, row_number, item):
+        """Queue an item; a full batch is handed to the writer threads"""
+        self.buffer.append((row_number, item))
+        if len(self.buffer) >= self.BATCH_SIZE:
+            self._flush()
+    
+    def _flush(self):
+        if not self.buffer:
+            return
+        batch, self.buffer = self.buffer, []
+        self.slots.acquire()
+        future = self.executor.submit(self._write_batch, batch)
+        future.add_done_callback(lambda _: self.slots.release())
+        self.futures.append(future)
+    
+    def _write_batch(self, batch):
+        pending = {}
+        for row_number, item in batch:
+            request = {'PutRequest': {'Item': {k: self.serializer.serialize(v) for k, v in item.items()}}}
+            pending[item['id']] = (row_number, request)
         
-        print(f"📥 Downloaded file to: {local_file}")
+        attempt = 0
+        requests = [request for _, request in pending.values()]
+        while requests:
+            try:
+                response = self.client.batch_write_item(RequestItems={self.table_name: requests})
+                unprocessed = response.get('UnprocessedItems', {}).get(self.table_name, [])
+            except self.client.exceptions.ProvisionedThroughputExceededException:
+                unprocessed = requests
+            except Exception as e:
+                with self.lock:
+                    self.failed_rows.extend((pending[r['PutRequest']['Item']['id']['S']][0], str(e))
+                                            for r in requests)
+                return
+            
+            done = len(requests) - len(unprocessed)
+            unprocessed_ids = {r['PutRequest']['Item']['id']['S'] for r in unprocessed}
+            with self.lock:
+                self.batches += 1
+                self.written += done
+                if unprocessed and attempt >= self.MAX_RETRIES:
+                    self.failed_rows.extend((pending[item_id][0], f"Write unprocessed after {attempt} retries")
+                                            for item_id in unprocessed_ids)
+                    return
+                if unprocessed:
+                    self.retries += 1
+                written = self.written
+            
+            if self.on_write:
+                self.on_write(written)
+            
+            requests = unprocessed
+            if requests:
+                time.sleep(random.uniform(0, min(self.MAX_DELAY, self.BASE_DELAY * (2 ** attempt))))
+                attempt += 1
+    
+    def close(self):
+        """Write any partial batch, wait for all writers and return write stats"""
+        self._flush()
+        for future in self.futures:
+            future.result()
+        self.executor.shutdown()
         
-        # Read CSV with pandas
-        df = pd.read_csv(local_file)
-        print(f"📊 Loaded {len(df)} records from CSV")
+        elapsed = time.monotonic() - self.started_at
+        return {
+            'written': self.written,
+            'failed': len(self.failed_rows),
+            'batches': self.batches,
+            'retries': self.retries,
+            'seconds': round(elapsed, 2),
+            'items_per_second': round(self.written / elapsed, 1) if elapsed > 0 else 0.0
+        }
+
+
+def iter_s3_object(s3_client, bucket, key, head=None):
+    """Yield an S3 object's bytes in order without touching local disk
+    
+    Large objects are fetched as parallel ranged GETs pinned to the object's
+    ETag; a bounded window of parts is kept in flight ahead of the reader.
+    """
+    head = head or s3_client.head_object(Bucket=bucket, Key=key)
+    size = head['ContentLength']
+    if size <= S3_RANGED_GET_THRESHOLD:
+        body = s3_client.get_object(Bucket=bucket, Key=key)['Body']
+        yield from body.iter_chunks(S3_PART_SIZE)
+        return
+    
+    def fetch(start):
+        end = min(start + S3_PART_SIZE, size) - 1
+        response = s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{end}",
+                                        IfMatch=head['ETag'])
+        return response['Body'].read()
+    
+    print(f"📥 Reading {size} bytes with {S3_READ_WORKERS} parallel ranged GETs")
+    with ThreadPoolExecutor(max_workers=S3_READ_WORKERS) as executor:
+        pending = deque()
+        for start in range(0, size, S3_PART_SIZE):
+            pending.append(executor.submit(fetch, start))
+            if len(pending) >= S3_READ_WORKERS * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class HashingStream(io.RawIOBase):
+    """Readable stream over byte chunks that hashes content as it is read"""
+    
+    def __init__(self, chunks, on_read=None):
+        self.chunks = iter(chunks)
+        self.on_read = on_read
+        self.digest = hashlib.md5()
+        self.bytes_read = 0
+        self._buffer = memoryview(b'')
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, target):
+        while not self._buffer:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                return 0
+            self.digest.update(chunk)
+            self.bytes_read += len(chunk)
+            self._buffer = memoryview(chunk)
+            if self.on_read:
+                self.on_read(self.bytes_read)
         
-        # Calculate file hash for duplicate prevention
-        with open(local_file, 'rb') as f:
-            file_content = f.read()
-            file_hash = hashlib.md5(file_content).hexdigest()
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+    
+    def hexdigest(self):
+        """Hash of the whole content, consuming anything the reader left unread"""
+        for chunk in self.chunks:
+            self.digest.update(chunk)
+            self.bytes_read += len(chunk)
+            if self.on_read:
+                self.on_read(self.bytes_read)
+        return self.digest.hexdigest()
+
+
+def resolve_column(df, variants):
+    """Resolve a field from its column variants once for the whole file
+    
+    Like the per-row lookup it replaces, each row takes its value from the
+    first variant present in the header that is not null for that row.
+    """
+    present = [col for col in variants if col in df.columns]
+    if not present:
+        return pd.Series(None, index=df.index, dtype=object)
+    
+    resolved = df[present[0]].astype(object)
+    for col in present[1:]:
+        resolved = resolved.where(resolved.notna(), df[col].astype(object))
+    return resolved
+
+
+def clean_column(values):
+    """Stripped text of each value, keeping nulls as nulls"""
+    return values.astype(str).str.strip().where(values.notna())
+
+
+def parquet_location(s3_key, file_hash, ingest_date):
+    """Partition directory of one source file's Parquet copy
+    
+    Laid out as ingest_date=/source_file=/file_hash=, so re-running the same
+    content overwrites its own copy and never touches other files.
+    """
+    source = re.sub(r'[^A-Za-z0-9._-]', '_', s3_key)
+    return f"{parquet_prefix}ingest_date={ingest_date}/source_file={source}/file_hash={file_hash}/"
+
+
+def export_parquet(records, s3_client, s3_key, file_hash, ingest_date):
+    """Write the records stored in DynamoDB as one Parquet object"""
+    location = parquet_location(s3_key, file_hash, ingest_date)
+    if len(records):
+        buffer = io.BytesIO()
+        records[PARQUET_COLUMNS].to_parquet(buffer, index=False)
+        s3_client.put_object(Bucket=s3_bucket, Key=f"{location}part-00000.parquet", Body=buffer.getvalue())
+        print(f"🗂️ Wrote {len(records)} record(s) to s3://{s3_bucket}/{location}")
+    return {'path': f"s3://{s3_bucket}/{location}", 'rows': len(records)}
+
+
+def process_rows_with_pandas(df, s3_key, file_hash, s3_client, dynamodb_client, existing_emails, progress):
+    """Validate and dedup rows with column-wide pandas operations, then write them"""
+    
+    progress.set_stage('validating')
+    
+    # Resolve and clean every field once per file
+    email = clean_column(resolve_column(df, EMAIL_COLUMNS)).str.lower()
+    name = clean_column(resolve_column(df, NAME_COLUMNS))
+    phone = clean_column(resolve_column(df, PHONE_COLUMNS)).fillna('')
+    signup_date = clean_column(resolve_column(df, DATE_COLUMNS)).fillna('')
+    
+    # Validation, in the same order as the original row checks
+    row_errors = pd.Series(None, index=df.index, dtype=object)
+    bad_format = ~(email.str.contains('@', regex=False) & email.str.contains('.', regex=False)).fillna(False)
+    row_errors = row_errors.mask(bad_format, "Invalid email format")
+    row_errors = row_errors.mask(name.isna(), "Name column not found (tried: name, full_name, Name, Full Name)")
+    row_errors = row_errors.mask(email.isna(), "Email column not found (tried: email, email_address, Email, Email Address)")
+    
+    # Duplicates: emails stored by another file, or seen earlier in this file.
+    # Emails this file stored in an earlier, partly written attempt are
+    # upserted again. The whole file is deduplicated before any writes, so
+    # every ID is unique.
+    valid = row_errors.isna()
+    stored = existing_emails.lookup(set(email[valid]))
+    print(f"📇 {len(stored)} email(s) of this file already exist")
+    stored_elsewhere = {stored_email for stored_email, stored_hash in stored.items() if stored_hash != file_hash}
+    
+    valid_emails = email[valid]
+    duplicate = valid_emails.isin(stored_elsewhere) | valid_emails.duplicated()
+    duplicate_index = valid_emails.index[duplicate.to_numpy()]
+    row_errors.loc[duplicate_index] = "Duplicate email " + email.loc[duplicate_index]
+    
+    failed = row_errors.dropna()
+    errors = [f"Row {index + 1}: {message}" for index, message in failed.items()]
+    error_records = len(failed)
+    if len(duplicate_index):
+        print(f"⚠️ {len(duplicate_index)} duplicate email(s) skipped")
+    if error_records > len(duplicate_index):
+        print(f"❌ {error_records - len(duplicate_index)} record(s) failed validation")
+    progress.update(rows_rejected=error_records - len(duplicate_index), rows_duplicate=len(duplicate_index))
+    
+    # Queue validated items; the batch writer sends them to DynamoDB
+    processed_at = datetime.now()
+    keep = row_errors.isna().to_numpy()
+    records = pd.DataFrame({
+        'id': [customer_id(value) for value in email[keep]],
+        'name': name[keep],
+        'email': email[keep],
+        'phone': phone[keep],
+        'signupDate': signup_date[keep],
+        'job_run_id': job_run_id,
+        'processed_at': processed_at.isoformat()
+    })
+    progress.set_stage('writing', total=len(records), counter='rows_written')
+    writer = BatchWriter(dynamodb_client, customers_table_name,
+                         on_write=lambda written: progress.update(rows_written=written))
+    
+    for index, row_id, row_name, row_email, row_phone, row_date in zip(
+            records.index, records['id'], records['name'], records['email'], records['phone'],
+            records['signupDate']):
+        writer.add(index + 1, {
+            'id': row_id,
+            'name': row_name,
+            'email': row_email,
+            'phone': row_phone,
+            'signupDate': row_date,
+            'source_file': s3_key,
+            'file_hash': file_hash,
+            'job_run_id': job_run_id,
+            'processed_at': processed_at.isoformat(),
+            'processing_method': 'aws_glue_pandas'
+        })
+    
+    write_stats = writer.close()
+    successful_records = write_stats['written']
+    error_records += write_stats['failed']
+    errors.extend(f"Row {row_number}: {reason}" for row_number, reason in sorted(writer.failed_rows))
+    print(f"💾 Wrote {write_stats['written']} item(s) in {write_stats['batches']} batch call(s) "
+          f"at {write_stats['items_per_second']} items/s ({write_stats['retries']} retries)")
+    
+    # Parquet copy of exactly the rows stored in DynamoDB
+    progress.set_stage('exporting')
+    failed_numbers = [row_number for row_number, _ in writer.failed_rows]
+    records = records[~(records.index + 1).isin(failed_numbers)]
+    existing_emails.add(set(records['email']), file_hash)
+    parquet = export_parquet(records, s3_client, s3_key, file_hash, processed_at.date().isoformat())
+    
+    return {
+        'records_processed': len(df),
+        'successful_records': successful_records,
+        'error_records': error_records,
+        'errors': errors,
+        'write_stats': write_stats,
+        'parquet': parquet
+    }
+
+
+def process_rows_with_spark(s3_key, file_hash, existing_emails, progress):
+    """Map, validate and dedup rows as distributed Spark transformations
+    
+    Each partition writes its own rows to DynamoDB with a BatchWriter, so
+    write throughput grows with the number of executors.
+    """
+    from pyspark.sql import functions as F
+    from pyspark.sql.types import LongType
+    from pyspark.sql.window import Window
+    
+    progress.set_stage('validating')
+    raw = spark.read.option('header', True).csv(f"s3://{s3_bucket}/{s3_key}")
+    
+    # Number rows in file order for error messages and record IDs. The schema
+    # is explicit so all-null columns and header-only files need no inference.
+    indexed = spark.createDataFrame(raw.rdd.zipWithIndex().map(lambda pair: tuple(pair[0]) + (pair[1],)),
+                                    raw.schema.add('_row_index', LongType()))
+    
+    def first_present(variants):
+        # Like the pandas loop: the first variant column with a value wins
+        present = [F.col(f"`{col}`") for col in variants if col in raw.columns]
+        return F.coalesce(*present) if present else F.lit(None).cast('string')
+    
+    rows = indexed.select(
+        '_row_index',
+        F.lower(F.trim(first_present(EMAIL_COLUMNS))).alias('email'),
+        F.trim(first_present(NAME_COLUMNS)).alias('name'),
+        F.coalesce(F.trim(first_present(PHONE_COLUMNS)), F.lit('')).alias('phone'),
+        F.coalesce(F.trim(first_present(DATE_COLUMNS)), F.lit('')).alias('signupDate')
+    )
+    
+    # Validation
+    rows = rows.withColumn(
+        'error',
+        F.when(F.col('email').isNull(),
+               F.lit("Email column not found (tried: email, email_address, Email, Email Address)"))
+         .when(F.col('name').isNull(),
+               F.lit("Name column not found (tried: name, full_name, Name, Full Name)"))
+         .when(~F.col('email').contains('@') | ~F.col('email').contains('.'),
+               F.lit("Invalid email format"))
+    )
+    
+    # Duplicates: emails stored by another file, or seen earlier in this file.
+    # Emails this file stored in an earlier, partly written attempt are
+    # upserted again. The whole file is deduplicated before any writes, so
+    # every ID is unique.
+    existing_df = existing_emails.frame().withColumn('_existing', F.lit(True))
+    stored_elsewhere = F.col('_existing').isNotNull() & \
+        ~F.coalesce(F.col('stored_hash') == F.lit(file_hash), F.lit(False))
+    
+    first_seen = Window.partitionBy('email').orderBy('_row_index')
+    valid = rows.filter(F.col('error').isNull()) \
+        .join(existing_df, 'email', 'left') \
+        .withColumn('error', F.when(stored_elsewhere | (F.row_number().over(first_seen) > 1),
+                                    F.concat(F.lit('Duplicate email '), F.col('email')))) \
+        .drop('_existing', 'stored_hash')
+    checked = rows.filter(F.col('error').isNotNull()).unionByName(valid) \
+        .withColumn('id', F.concat(F.lit('customer_'),
+                                   F.substring(F.sha2(F.col('email'), 256), 1, CUSTOMER_ID_DIGITS))) \
+        .cache()
+    
+    totals = checked.agg(
+        F.count('*').alias('rows'),
+        F.count('error').alias('errors'),
+        F.sum(F.col('error').startswith('Duplicate email ').cast('int')).alias('duplicates')
+    ).first()
+    duplicates = totals['duplicates'] or 0
+    progress.update(rows_read=totals['rows'], rows_rejected=totals['errors'] - duplicates,
+                    rows_duplicate=duplicates)
+    
+    # Executors cannot reach the registry item, so written rows are reported once at the end
+    progress.set_stage('writing', total=totals['rows'] - totals['errors'], counter='rows_written')
+    
+    # Write each partition from the executors; only write failures come back
+    table_name, source_file, run_id = customers_table_name, s3_key, job_run_id
+    started_at = datetime.now()
+    processed_at = started_at.isoformat()
+    
+    def write_partition(partition):
+        writer = BatchWriter(boto3.client('dynamodb'), table_name)
+        for row in partition:
+            writer.add(row['_row_index'] + 1, {
+                'id': row['id'],
+                'name': row['name'],
+                'email': row['email'],
+                'phone': row['phone'],
+                'signupDate': row['signupDate'],
+                'source_file': source_file,
+                'file_hash': file_hash,
+                'job_run_id': run_id,
+                'processed_at': processed_at,
+                'processing_method': 'aws_glue_spark'
+            })
+        stats = writer.close()
+        yield ('stats', stats)
+        for row_number, reason in writer.failed_rows:
+            yield ('failed', (row_number, reason))
+    
+    outcomes = checked.filter(F.col('error').isNull()).rdd.mapPartitions(write_partition).collect()
+    partition_stats = [value for kind, value in outcomes if kind == 'stats']
+    failed_rows = sorted(value for kind, value in outcomes if kind == 'failed')
+    
+    elapsed = (datetime.now() - started_at).total_seconds()
+    written = sum(stats['written'] for stats in partition_stats)
+    write_stats = {
+        'written': written,
+        'failed': len(failed_rows),
+        'batches': sum(stats['batches'] for stats in partition_stats),
+        'retries': sum(stats['retries'] for stats in partition_stats),
+        'partitions': len(partition_stats),
+        'seconds': round(elapsed, 2),
+        'items_per_second': round(written / elapsed, 1) if elapsed > 0 else 0.0
+    }
+    print(f"💾 Wrote {written} item(s) from {len(partition_stats)} partition(s) "
+          f"at {write_stats['items_per_second']} items/s ({write_stats['retries']} retries)")
+    
+    progress.update(rows_written=written)
+    
+    # Parquet copy of exactly the rows stored in DynamoDB
+    progress.set_stage('exporting')
+    location = parquet_location(s3_key, file_hash, started_at.date().isoformat())
+    exported = checked.filter(F.col('error').isNull())
+    if failed_rows:
+        exported = exported.filter(~(F.col('_row_index') + 1).isin([row_number for row_number, _ in failed_rows]))
+    if written:
+        exported.withColumn('job_run_id', F.lit(run_id)) \
+            .withColumn('processed_at', F.lit(processed_at)) \
+            .select(*PARQUET_COLUMNS) \
+            .write.mode('overwrite').parquet(f"s3://{s3_bucket}/{location}")
+        print(f"🗂️ Wrote {written} record(s) to s3://{s3_bucket}/{location}")
+        existing_emails.add_frame(exported, file_hash)
+    parquet = {'path': f"s3://{s3_bucket}/{location}", 'rows': written}
+    
+    invalid = checked.filter(F.col('error').isNotNull())
+    errors = [f"Row {row['_row_index'] + 1}: {row['error']}"
+              for row in invalid.orderBy('_row_index').limit(SPARK_ERROR_SAMPLE).collect()]
+    errors.extend(f"Row {row_number}: {reason}" for row_number, reason in failed_rows)
+    checked.unpersist()
+    
+    return {
+        'records_processed': totals['rows'],
+        'successful_records': written,
+        'error_records': totals['errors'] + len(failed_rows),
+        'errors': errors,
+        'write_stats': write_stats,
+        'parquet': parquet
+    }
+
+
+def process_csv(s3_key, s3_client, dynamodb_client, existing_emails):
+    """Process one CSV file with pandas or Spark, depending on --processing_mode"""
+    
+    print(f"📁 Processing file: s3://{s3_bucket}/{s3_key}")
+    
+    # Resources are not thread-safe, so each file gets its own registry table
+    # for calls from this thread; the heartbeat and progress writes, which
+    # run on other threads, use the shared low-level client
+    registry = boto3.session.Session().resource('dynamodb').Table(file_registry_table_name)
+    lease_id = f"object#{s3_key}"
+    heartbeat = LeaseHeartbeat(dynamodb_client)
+    object_leased = False
+    file_claimed = False
+    try:
+        # Lease the object so concurrent runs never process the same file
+        try:
+            head = s3_client.head_object(Bucket=s3_bucket, Key=s3_key)
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('404', 'NoSuchKey'):
+                raise
+            print(f"⚠️ {s3_key} no longer exists. Skipping.")
+            return {'success': True, 's3_key': s3_key, 'status': 'skipped',
+                    'records_processed': 0, 'message': 'File no longer exists'}
         
-        print(f"🔐 File hash: {file_hash}")
+        if not lease_object(registry, s3_key, head['ETag']):
+            print(f"⚠️ {s3_key} is leased by another run. Skipping.")
+            return {'success': True, 's3_key': s3_key, 'status': 'skipped',
+                    'records_processed': 0, 'message': 'File is leased by another run'}
+        object_leased = True
+        heartbeat.add(lease_id)
+        progress = ProgressReporter(dynamodb_client, lease_id)
         
-        # Check for duplicate file content
-        response = table.scan(
-            FilterExpression='file_hash = :file_hash',
-            ExpressionAttributeValues={':file_hash': file_hash}
-        )
+        # Stream the object once to hash it. Both modes claim the same MD5 as
+        # the S3 pipeline Lambda; multipart ETags are not content hashes.
+        progress.set_stage('reading', total=head['ContentLength'], counter='bytes_read')
+        stream = HashingStream(iter_s3_object(s3_client, s3_bucket, s3_key, head),
+                               on_read=lambda bytes_read: progress.update(bytes_read=bytes_read))
+        df = None
+        if processing_mode != 'spark':
+            # pandas parses the stream while it is hashed; Spark reads S3 itself
+            df = pd.read_csv(io.BufferedReader(stream, S3_PART_SIZE))
+            progress.update(rows_read=len(df))
+            print(f"📊 Loaded {len(df)} records from CSV")
+        file_hash = stream.hexdigest()
+        print(f"🔐 File hash: {file_hash} ({stream.bytes_read} bytes streamed)")
         
-        if response['Items']:
-            print(f"⚠️ File content with hash {file_hash} has already been processed. Skipping.")
+        # Claim the file content so no other run processes it
+        claimed, existing = claim_file(registry, file_hash, s3_key)
+        if not claimed:
+            if existing and existing.get('status') == 'completed':
+                print(f"⚠️ File content with hash {file_hash} has already been processed. Skipping.")
+                message = 'File content already processed'
+            else:
+                print(f"⚠️ File content with hash {file_hash} is being processed by another run. Skipping.")
+                message = 'File content is being processed by another run'
+            update_registry_item(registry, lease_id, 'skipped', file_hash=file_hash, message=message)
             return {
                 'success': True,
+                's3_key': s3_key,
+                'status': 'skipped',
                 'records_processed': 0,
-                'message': 'File content already processed',
+                'message': message,
                 'file_hash': file_hash
             }
+        file_claimed = True
+        heartbeat.add(f"hash#{file_hash}")
         
-        # Process records
-        successful_records = 0
-        error_records = 0
-        errors = []
-        
-        for index, row in df.iterrows():
-            try:
-                # Handle different column name variations
-                email_col = None
-                name_col = None
-                
-                # Check for email column variations
-                for col in ['email', 'email_address', 'Email', 'Email Address']:
-                    if col in row and not pd.isna(row[col]):
-                        email_col = col
-                        break
-                
-                # Check for name column variations
-                for col in ['name', 'full_name', 'Name', 'Full Name']:
-                    if col in row and not pd.isna(row[col]):
-                        name_col = col
-                        break
-                
-                if email_col is None:
-                    raise ValueError("Email column not found (tried: email, email_address, Email, Email Address)")
-                
-                if name_col is None:
-                    raise ValueError("Name column not found (tried: name, full_name, Name, Full Name)")
-                
-                # Clean and validate data
-                email = str(row[email_col]).strip().lower()
-                name = str(row[name_col]).strip()
-                
-                # Handle phone column variations
-                phone = ''
-                for phone_col in ['phone', 'phone_number', 'Phone', 'Phone Number']:
-                    if phone_col in row and not pd.isna(row[phone_col]):
-                        phone = str(row[phone_col]).strip()
-                        break
-                
-                # Handle date column variations
-                signup_date = ''
-                for date_col in ['signupDate', 'hire_date', 'Signup Date', 'Hire Date']:
-                    if date_col in row and not pd.isna(row[date_col]):
-                        signup_date = str(row[date_col]).strip()
-                        break
-                
-                # Validate email format
-                if '@' not in email or '.' not in email:
-                    raise ValueError("Invalid email format")
-                
-                # Check for duplicate email
-                email_response = table.scan(
-                    FilterExpression='email = :email',
-                    ExpressionAttributeValues={':email': email}
-                )
-                
-                if email_response['Items']:
-                    print(f"⚠️ Duplicate email found: {email}")
-                    error_records += 1
-                    errors.append(f"Row {index + 1}: Duplicate email {email}")
-                    continue
-                
-                # Create customer record
-                customer_id = f"customer_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{index}"
-                
-                customer_data = {
-                    'id': customer_id,
-                    'name': name,
-                    'email': email,
-                    'phone': phone,
-                    'signupDate': signup_date,
-                    'source_file': s3_key,
-                    'file_hash': file_hash,
-                    'job_run_id': job_run_id,
-                    'processed_at': datetime.now().isoformat(),
-                    'processing_method': 'aws_glue_pandas'
-                }
-                
-                # Write to DynamoDB
-                table.put_item(Item=customer_data)
-                successful_records += 1
-                
-                print(f"✅ Processed record {index + 1}: {email}")
-                
-            except Exception as e:
-                error_records += 1
-                error_msg = f"Row {index + 1}: {str(e)}"
-                errors.append(error_msg)
-                print(f"❌ Error processing record {index + 1}: {str(e)}")
+        if processing_mode == 'spark':
+            result_counts = process_rows_with_spark(s3_key, file_hash, existing_emails, progress)
+        else:
+            result_counts = process_rows_with_pandas(df, s3_key, file_hash, s3_client, dynamodb_client,
+                                                     existing_emails, progress)
         
         # Move processed file
+        progress.set_stage('finishing')
         processed_key = f"processed/{s3_key}"
         s3_client.copy_object(
             Bucket=s3_bucket,
@@ -191,20 +1093,35 @@ def process_csv_with_pandas():
         
         print(f"📁 Moved file to: {processed_key}")
         
+        total_records = result_counts['records_processed']
+        successful_records = result_counts['successful_records']
+        error_records = result_counts['error_records']
+        heartbeat.stop()
+        release_file_claim(registry, file_hash, 'completed',
+                           successful_records=successful_records, error_records=error_records)
+        progress.set_stage('completed')
+        update_registry_item(registry, lease_id, 'completed', file_hash=file_hash,
+                             successful_records=successful_records, error_records=error_records)
+        
         # Return results
         result = {
             'success': True,
-            'records_processed': len(df),
+            's3_key': s3_key,
+            'status': 'completed',
+            'records_processed': total_records,
             'successful_records': successful_records,
             'error_records': error_records,
-            'errors': errors,
+            'errors': result_counts['errors'],
+            'write_stats': result_counts['write_stats'],
+            'parquet': result_counts['parquet'],
+            'processing_mode': processing_mode,
             'file_hash': file_hash,
             'job_run_id': job_run_id,
             'message': f'Processing complete! {successful_records} records processed successfully.'
         }
         
-        print(f"🎉 Job completed successfully!")
-        print(f"   Total records: {len(df)}")
+        print(f"🎉 Finished {s3_key}")
+        print(f"   Total records: {total_records}")
         print(f"   Successful: {successful_records}")
         print(f"   Errors: {error_records}")
         
@@ -212,6 +1129,18 @@ def process_csv_with_pandas():
         
     except Exception as e:
         print(f"❌ Job failed with error: {str(e)}")
+        heartbeat.stop()
+        
+        if file_claimed:
+            try:
+                release_file_claim(registry, file_hash, 'failed', error=str(e))
+            except Exception as claim_error:
+                print(f"⚠️ Could not release file claim: {str(claim_error)}")
+        if object_leased:
+            try:
+                update_registry_item(registry, lease_id, 'failed', error=str(e))
+            except Exception as lease_error:
+                print(f"⚠️ Could not release file lease: {str(lease_error)}")
         
         # Move failed file
         failed_key = f"failed/{s3_key}"
@@ -228,16 +1157,62 @@ def process_csv_with_pandas():
         
         return {
             'success': False,
+            's3_key': s3_key,
+            'status': 'failed',
             'records_processed': 0,
             'successful_records': 0,
             'error_records': 0,
             'errors': [f'Job failed: {str(e)}'],
             'message': f'Job failed: {str(e)}'
         }
+    finally:
+        heartbeat.stop()
+
+
+def process_files():
+    """Process every input file of this run, several files at a time"""
+    
+    print(f"🚀 Starting Glue job: {job_run_id} ({processing_mode} mode)")
+    
+    # Clients are thread-safe and shared by all file workers
+    s3_client = boto3.client('s3')
+    dynamodb_client = boto3.client('dynamodb')
+    # Existing emails are read once per run and shared the same way
+    existing_emails = ExistingEmails(dynamodb_client)
+    
+    keys = resolve_input_keys(s3_client)
+    if not keys:
+        print("❌ No files found in bucket")
+        return {
+            'success': False,
+            'files': [],
+            'message': 'No files to process'
+        }
+    
+    workers = max(1, min(file_workers, len(keys)))
+    print(f"📁 {len(keys)} file(s) to process with {workers} worker(s)")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        files = list(executor.map(lambda key: process_csv(key, s3_client, dynamodb_client, existing_emails), keys))
+    
+    statuses = [f['status'] for f in files]
+    summary = {status: statuses.count(status) for status in ('completed', 'skipped', 'failed')}
+    result = {
+        'success': summary['failed'] == 0,
+        'job_run_id': job_run_id,
+        'files': files,
+        'file_counts': summary,
+        'records_processed': sum(f['records_processed'] for f in files),
+        'successful_records': sum(f.get('successful_records', 0) for f in files),
+        'error_records': sum(f.get('error_records', 0) for f in files),
+        'message': (f"Processed {len(files)} file(s): {summary['completed']} completed, "
+                    f"{summary['skipped']} skipped, {summary['failed']} failed")
+    }
+    print(f"🎉 {result['message']}")
+    return result
 
 # Execute the job
 if __name__ == "__main__":
-    result = process_csv_with_pandas()
+    result = process_files()
     print(f"📊 Final result: {json.dumps(result, indent=2)}")
     
     # Exit with appropriate code
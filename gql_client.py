@@ -4,14 +4,133 @@ Scalable GraphQL client for Foreman
 
 import requests
 import os
-from typing import Dict, Any, Tuple, Optional
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Any, List, Tuple, Optional, Iterable, Iterator
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
 from models.base import BaseModel
 
 
+class ThrottleController:
+    """Retry/backoff policy plus an adaptive limit on in-flight requests
+    
+    The limit halves when AppSync or the resolver throttles us and grows back
+    by one after a full window of successful requests (AIMD). Creates are not
+    idempotent, so only throttled requests and connections that failed before
+    the request was sent are retried.
+    """
+    
+    RETRYABLE_STATUS = {429}
+    THROTTLE_MARKERS = ('throttl', 'rate exceeded', 'too many requests', 'limit exceeded')
+    
+    def __init__(self, max_concurrency: int = 1, max_retries: int = 8,
+                 base_delay: float = 0.5, max_delay: float = 30.0):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.limit = self.max_concurrency
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self._successes = 0
+        self._last_decrease = 0.0
+        
+        # Run statistics
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.server_errors = 0
+        self.connection_errors = 0
+        self.backoff_seconds = 0.0
+        self.started_at: Optional[float] = None
+    
+    @contextmanager
+    def slot(self):
+        """Hold one in-flight request slot, waiting while the limit is reached"""
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+            self.requests += 1
+            if self.started_at is None:
+                self.started_at = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify()
+    
+    def is_throttling_error(self, error: Any) -> bool:
+        """Check whether a GraphQL error entry is a throttling/rate-limit error"""
+        if not isinstance(error, dict):
+            return False
+        text = f"{error.get('errorType', '')} {error.get('message', '')}".lower()
+        return any(marker in text for marker in self.THROTTLE_MARKERS)
+    
+    def record_success(self):
+        """Additive increase: one more slot after a full window of successes"""
+        with self._cond:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.max_concurrency:
+                self.limit += 1
+                self._successes = 0
+                self._cond.notify()
+    
+    def record_throttle(self):
+        """Multiplicative decrease, at most once per second of throttling"""
+        with self._cond:
+            self.throttled += 1
+            self._successes = 0
+            now = time.monotonic()
+            if now - self._last_decrease >= 1.0:
+                self.limit = max(1, self.limit // 2)
+                self._last_decrease = now
+    
+    def record_server_error(self):
+        """Count a 5xx response (returned to the caller, never retried)"""
+        with self._cond:
+            self.server_errors += 1
+    
+    def record_connection_error(self):
+        """Count a connection or timeout failure"""
+        with self._cond:
+            self.connection_errors += 1
+    
+    def backoff(self, attempt: int):
+        """Sleep for a jittered exponential delay before retry number attempt + 1"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        with self._cond:
+            self.retries += 1
+            self.backoff_seconds += delay
+        time.sleep(delay)
+    
+    def summary(self) -> Dict[str, Any]:
+        """Get retry, backoff and request rate statistics for the run"""
+        elapsed = time.monotonic() - self.started_at if self.started_at is not None else 0.0
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'throttled': self.throttled,
+            'server_errors': self.server_errors,
+            'connection_errors': self.connection_errors,
+            'backoff_seconds': self.backoff_seconds,
+            'elapsed_seconds': elapsed,
+            'request_rate': self.requests / elapsed if elapsed > 0 else 0.0,
+            'final_concurrency': self.limit,
+        }
+
+
 class GraphQLClient:
     """Generic GraphQL client for AppSync"""
     
-    def __init__(self):
+    def __init__(self, max_connections: int = 10, max_retries: int = 8,
+                 timeout: Tuple[float, float] = (5.0, 30.0)):
         self.graphql_url = os.getenv("GRAPHQL_URL")
         self.api_key = os.getenv("APPSYNC_API_KEY")
         
@@ -20,6 +139,16 @@ class GraphQLClient:
         
         if not self.api_key:
             raise ValueError("APPSYNC_API_KEY environment variable is required. Please set it in your .env file.")
+        
+        # Pooled keep-alive session shared by all requests (and worker threads)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, max_connections))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        self.throttle = ThrottleController(max_concurrency=max_connections, max_retries=max_retries)
+        # (connect, read) seconds, so a stalled request cannot hang a worker forever
+        self.timeout = timeout
     
     def _get_headers(self) -> Dict[str, str]:
         """Get request headers"""
@@ -32,16 +161,70 @@ class GraphQLClient:
         
         return headers
     
+    @staticmethod
+    def _failed_before_send(error: requests.RequestException) -> bool:
+        """Check whether a connection error happened before any bytes were sent"""
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+    
+    def _is_retryable(self, response: requests.Response) -> bool:
+        """Check for HTTP throttling or an all-throttled GraphQL response"""
+        if response.status_code in ThrottleController.RETRYABLE_STATUS:
+            return True
+        if response.status_code != 200 or b'"errors"' not in response.content:
+            return False
+        try:
+            data = response.json()
+        except ValueError:
+            return False
+        errors = data.get("errors") or []
+        has_data = any(value for value in (data.get("data") or {}).values())
+        return bool(errors) and not has_data and all(self.throttle.is_throttling_error(e) for e in errors)
+    
+    def _post(self, payload: Dict[str, Any], attempt: int = 0) -> requests.Response:
+        """POST a GraphQL payload, retrying throttled and unsent requests with backoff
+        
+        attempt is the number of retries already spent on these rows, so
+        resubmitted batches share one retry budget.
+        """
+        while True:
+            try:
+                with self.throttle.slot():
+                    response = self.session.post(
+                        self.graphql_url,
+                        json=payload,
+                        headers=self._get_headers(),
+                        timeout=self.timeout
+                    )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.throttle.record_connection_error()
+                # Once the request may have reached the server, a retry could create a duplicate
+                if not self._failed_before_send(e) or attempt >= self.throttle.max_retries:
+                    raise
+                self.throttle.backoff(attempt)
+                attempt += 1
+                continue
+            
+            if self._is_retryable(response):
+                self.throttle.record_throttle()
+                if attempt < self.throttle.max_retries:
+                    self.throttle.backoff(attempt)
+                    attempt += 1
+                    continue
+            elif response.status_code >= 500:
+                self.throttle.record_server_error()
+            else:
+                self.throttle.record_success()
+            return response
+    
     def submit_record(self, model: BaseModel, row) -> Tuple[bool, Any]:
         """Submit a record using the provided model"""
         try:
             mutation, variables = model.create_mutation(row)
             
-            response = requests.post(
-                self.graphql_url,
-                json={'query': mutation, 'variables': variables},
-                headers=self._get_headers()
-            )
+            response = self._post({'query': mutation, 'variables': variables})
             
             if response.status_code != 200:
                 return False, f"HTTP {response.status_code}: {response.text}"
@@ -61,12 +244,100 @@ class GraphQLClient:
         except Exception as e:
             return False, str(e)
     
+    def submit_batch(self, model: BaseModel, rows: List, _attempt: int = 0) -> List[Tuple[bool, Any]]:
+        """Submit several records in one request, returning one result per row"""
+        try:
+            mutation, variables = model.create_batch_mutation(rows)
+            
+            response = self._post({'query': mutation, 'variables': variables}, _attempt)
+            
+            if response.status_code != 200:
+                return [(False, f"HTTP {response.status_code}: {response.text}")] * len(rows)
+            
+            data = response.json()
+        except Exception as e:
+            return [(False, str(e))] * len(rows)
+        
+        # Partial errors carry the alias of the failed field as the first path element
+        row_errors: Dict[int, List[Any]] = {}
+        general_errors = []
+        for error in data.get("errors") or []:
+            path = error.get("path") or []
+            alias = path[0] if path else None
+            if isinstance(alias, str) and alias.startswith('r') and alias[1:].isdigit():
+                row_errors.setdefault(int(alias[1:]), []).append(error)
+            else:
+                general_errors.append(error)
+        
+        results = []
+        payload = data.get("data") or {}
+        for i in range(len(rows)):
+            result = payload.get(f"r{i}")
+            if i in row_errors:
+                results.append((False, row_errors[i]))
+            elif result:
+                results.append((True, result))
+            elif general_errors:
+                results.append((False, general_errors))
+            else:
+                results.append((False, "No data returned from mutation"))
+        
+        # Rows that were only throttled are retried as a smaller batch. A fully
+        # throttled response has already used up its retries in _post.
+        throttled = [i for i, errors in row_errors.items()
+                     if all(self.throttle.is_throttling_error(e) for e in errors)]
+        if throttled and _attempt < self.throttle.max_retries and not self._is_retryable(response):
+            self.throttle.record_throttle()
+            self.throttle.backoff(_attempt)
+            retried = self.submit_batch(model, [rows[i] for i in throttled], _attempt + 1)
+            for i, result in zip(throttled, retried):
+                results[i] = result
+        
+        return results
+    
+    def submit_records(self, model: BaseModel, rows: Iterable, concurrency: int = 1,
+                       batch_size: int = 1) -> Iterator[Tuple[bool, Any]]:
+        """Submit rows using a worker pool, yielding results in input order
+        
+        With batch_size > 1, rows are grouped into batched mutations and each
+        batch is one request.
+        """
+        def submit(batch):
+            if batch_size <= 1:
+                return [self.submit_record(model, batch[0])]
+            return self.submit_batch(model, batch)
+        
+        def batches():
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        
+        if concurrency <= 1:
+            for batch in batches():
+                yield from submit(batch)
+            return
+        
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            # Keep a bounded window of in-flight batches so large inputs stay lazy
+            pending = deque()
+            for batch in batches():
+                pending.append(executor.submit(submit, batch))
+                if len(pending) >= concurrency * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+    
     def get_record(self, model: BaseModel, record_id: str) -> Tuple[bool, Any]:
         """Get a record using the provided model"""
         try:
             query, variables = model.get_query(record_id)
             
-            response = requests.post(
+            response = self.session.post(
                 self.graphql_url,
                 json={'query': query, 'variables': variables},
                 headers=self._get_headers()
@@ -93,7 +364,7 @@ class GraphQLClient:
     def test_connection(self) -> Tuple[bool, str]:
         """Test the GraphQL connection"""
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.graphql_url,
                 json={'query': '{ __schema { types { name } } }'},
                 headers=self._get_headers()
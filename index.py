@@ -1,7 +1,45 @@
+import base64
+import gzip
+import hashlib
+import hmac
 import json
 import boto3
 import os
+import time
+import math
+import secrets
+import uuid
+from botocore.config import Config
 from datetime import datetime, timezone
+from decimal import Decimal
+
+ENVIRONMENT = os.environ.get('ENVIRONMENT', 'dev')
+FILE_REGISTRY_TABLE = f"foreman-{ENVIRONMENT}-file-registry"
+GLUE_JOB_NAME = f"foreman-{ENVIRONMENT}-csv-processing-job"
+UPLOAD_BUCKET = f"foreman-{ENVIRONMENT}-csv-uploads"
+
+# Browser uploads go straight to S3 as presigned multipart uploads. Parts are
+# at least 8 MB and there are at most 1000 of them, which keeps the URL list
+# well under the Lambda response limit while allowing multi-GB files.
+UPLOAD_MIN_PART_SIZE = 8 * 1024 * 1024
+UPLOAD_MAX_PARTS = 1000
+UPLOAD_URL_EXPIRES_SECONDS = 3600
+
+# Created once per Lambda container and reused by every warm invocation
+dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+file_registry = dynamodb.Table(FILE_REGISTRY_TABLE)
+glue = boto3.client('glue', region_name='us-east-1')
+s3 = boto3.client('s3', region_name='us-east-1', config=Config(signature_version='s3v4'))
+
+# Glue run states that never change again; these are cached on the upload record
+TERMINAL_JOB_STATES = ['SUCCEEDED', 'FAILED', 'STOPPED', 'TIMEOUT', 'ERROR']
+
+# Long-polled status checks wait up to this long for the file's records to
+# change, re-reading them with growing delays; past that the page backs off
+# between requests, so a slow job never holds a Lambda for long
+STATUS_MAX_WAIT_SECONDS = 4
+STATUS_POLL_MIN_DELAY = 0.5
+STATUS_POLL_MAX_DELAY = 2.0
 
 def lambda_handler(event, context):
     try:
@@ -10,14 +48,7 @@ def lambda_handler(event, context):
         
         if http_method == 'GET':
             if path == '/':
-                return {
-                    'statusCode': 200,
-                    'headers': {
-                        'Content-Type': 'text/html',
-                        'Access-Control-Allow-Origin': '*'
-                    },
-                    'body': get_html_content()
-                }
+                return html_response(event)
             elif path == '/favicon.ico':
                 # Return a simple 1x1 transparent PNG favicon
                 favicon_data = 'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=='
@@ -48,6 +79,12 @@ def lambda_handler(event, context):
                 return handle_enhanced_status_check(event)
             elif query_params.get('action') == 'glue-upload':
                 return handle_glue_upload(event)
+            elif query_params.get('action') == 'upload-init':
+                return handle_upload_init(event)
+            elif query_params.get('action') == 'upload-complete':
+                return handle_upload_complete(event)
+            elif query_params.get('action') == 'upload-abort':
+                return handle_upload_abort(event)
             else:
                 return handle_upload(event)
         else:
@@ -676,8 +713,9 @@ def get_html_content():
             const statusUpdates = document.getElementById('statusUpdates');
             
             let currentS3Key = null;
+            let currentJobRunId = null;
             let totalRecords = 0;
-            let checkStatusInterval = null;
+            let monitoringRun = 0;
             
             // Drag and drop functionality
             uploadArea.addEventListener('dragover', (e) => {
@@ -713,48 +751,107 @@ def get_html_content():
                 uploadFile(file);
             }
             
+            // Parts are PUT straight to S3 through presigned URLs, several at a time
+            const UPLOAD_CONCURRENCY = 4;
+            const UPLOAD_PART_ATTEMPTS = 3;
+            
+            async function postJson(url, payload) {
+                const response = await fetch(url, {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                    },
+                    body: JSON.stringify(payload)
+                });
+                const result = await response.json();
+                if (!response.ok) {
+                    throw new Error(result.error || `HTTP ${response.status}`);
+                }
+                return result;
+            }
+            
+            async function uploadPart(url, blob) {
+                for (let attempt = 1; ; attempt++) {
+                    try {
+                        const response = await fetch(url, { method: 'PUT', body: blob });
+                        if (!response.ok) {
+                            throw new Error(`HTTP ${response.status}`);
+                        }
+                        return response.headers.get('ETag');
+                    } catch (error) {
+                        if (attempt >= UPLOAD_PART_ATTEMPTS) {
+                            throw error;
+                        }
+                        await new Promise(resolve => setTimeout(resolve, 500 * 2 ** attempt));
+                    }
+                }
+            }
+            
             async function uploadFile(file) {
                 try {
                     progressContainer.style.display = 'block';
                     statusText.textContent = '📤 Uploading file...';
-                    progressFill.style.width = '10%';
+                    progressFill.style.width = '0%';
                     
-                    const reader = new FileReader();
-                    reader.onload = async function(e) {
-                        const csvData = e.target.result;
-                        const base64Data = btoa(csvData);
-                        
-                        const response = await fetch('?action=glue-upload', {
-                            method: 'POST',
-                            headers: {
-                                'Content-Type': 'application/json',
-                            },
-                            body: JSON.stringify({
-                                csv_data: base64Data,
-                                filename: file.name
-                            })
-                        });
-                        
-                        const result = await response.json();
-                        
-                        if (result.success) {
-                            currentS3Key = result.filename;
-                            totalRecords = result.total_records || 0;
-                            statusText.textContent = '🚀 Glue job started! Monitoring progress...';
-                            progressFill.style.width = '20%';
-                            
-                            addStatusUpdate('info', '✅ File uploaded successfully');
-                            addStatusUpdate('info', `📊 Total records to process: ${totalRecords}`);
-                            addStatusUpdate('info', '🔄 Starting AWS Glue processing...');
+                    const upload = await postJson('?action=upload-init', {
+                        filename: file.name,
+                        size: file.size
+                    });
+                    
+                    const completedParts = [];
+                    let nextPart = 0;
+                    let uploadedBytes = 0;
+                    
+                    async function uploadWorker() {
+                        while (nextPart < upload.parts.length) {
+                            const index = nextPart++;
+                            const part = upload.parts[index];
+                            const blob = file.slice(index * upload.part_size, (index + 1) * upload.part_size);
+                            const etag = await uploadPart(part.url, blob);
+                            completedParts.push({ PartNumber: part.part_number, ETag: etag });
                             
-                            // Start monitoring progress
-                            startProgressMonitoring();
-                        } else {
-                            throw new Error(result.error || 'Upload failed');
+                            uploadedBytes += blob.size;
+                            const percent = file.size ? Math.round((uploadedBytes / file.size) * 100) : 100;
+                            progressFill.style.width = percent + '%';
+                            statusText.textContent = `📤 Uploading file... ${percent}%`;
                         }
-                    };
+                    }
                     
-                    reader.readAsText(file);
+                    try {
+                        const workers = Math.min(UPLOAD_CONCURRENCY, upload.parts.length);
+                        await Promise.all(Array.from({ length: workers }, uploadWorker));
+                    } catch (error) {
+                        postJson('?action=upload-abort', {
+                            key: upload.key,
+                            upload_id: upload.upload_id,
+                            upload_token: upload.upload_token
+                        })
+                            .catch(abortError => console.error('Abort error:', abortError));
+                        throw error;
+                    }
+                    
+                    const result = await postJson('?action=upload-complete', {
+                        key: upload.key,
+                        upload_id: upload.upload_id,
+                        upload_token: upload.upload_token,
+                        parts: completedParts
+                    });
+                    
+                    if (result.success) {
+                        currentS3Key = result.filename;
+                        currentJobRunId = result.job_run_id;
+                        totalRecords = 0;
+                        statusText.textContent = '🚀 Glue job started! Monitoring progress...';
+                        progressFill.style.width = '0%';
+                        
+                        addStatusUpdate('info', `✅ File uploaded successfully (${upload.parts.length} part(s))`);
+                        addStatusUpdate('info', '🔄 Starting AWS Glue processing...');
+                        
+                        // Start monitoring progress
+                        startProgressMonitoring();
+                    } else {
+                        throw new Error(result.error || 'Upload failed');
+                    }
                     
                 } catch (error) {
                     console.error('Upload error:', error);
@@ -764,36 +861,57 @@ def get_html_content():
             }
             
             function startProgressMonitoring() {
-                if (checkStatusInterval) {
-                    clearInterval(checkStatusInterval);
-                }
+                // Short long poll: each request waits a few seconds server-side for a
+                // change, then the page backs off while nothing changes.
+                // Starting a new run stops any previous one.
+                const run = ++monitoringRun;
+                let version = null;
+                let idleDelay = 0;
                 
-                checkStatusInterval = setInterval(async () => {
-                    try {
-                        const response = await fetch('?action=check-status', {
-                            method: 'POST',
-                            headers: {
-                                'Content-Type': 'application/json',
-                            },
-                            body: JSON.stringify({
-                                s3_key: currentS3Key
-                            })
-                        });
-                        
-                        const result = await response.json();
-                        
-                        updateProgress(result);
-                        
-                        if (result.processed) {
-                            clearInterval(checkStatusInterval);
-                            checkStatusInterval = null;
+                (async () => {
+                    while (run === monitoringRun) {
+                        try {
+                            const response = await fetch('?action=check-status', {
+                                method: 'POST',
+                                headers: {
+                                    'Content-Type': 'application/json',
+                                },
+                                body: JSON.stringify({
+                                    s3_key: currentS3Key,
+                                    job_run_id: currentJobRunId,
+                                    since: version,
+                                    wait: 4
+                                })
+                            });
+                            
+                            const result = await response.json();
+                            if (!response.ok) {
+                                throw new Error(result.error || `HTTP ${response.status}`);
+                            }
+                            if (run !== monitoringRun) {
+                                return;
+                            }
+                            
+                            const changed = result.version !== version;
+                            version = result.version;
+                            updateProgress(result);
+                            
+                            if (result.processed) {
+                                return;
+                            }
+                            
+                            idleDelay = changed ? 0 : Math.min(Math.max(idleDelay * 2, 1000), 8000);
+                            if (idleDelay) {
+                                await new Promise(resolve => setTimeout(resolve, idleDelay));
+                            }
+                            
+                        } catch (error) {
+                            console.error('Status check error:', error);
+                            addStatusUpdate('error', '❌ Status check failed: ' + error.message);
+                            await new Promise(resolve => setTimeout(resolve, 5000));
                         }
-                        
-                    } catch (error) {
-                        console.error('Status check error:', error);
-                        addStatusUpdate('error', '❌ Status check failed: ' + error.message);
                     }
-                }, 2000); // Check every 2 seconds
+                })();
             }
             
             function updateProgress(data) {
@@ -904,11 +1022,92 @@ def get_html_content():
     </html>
     '''
 
+# The page never changes within a deployment, so it is rendered, compressed
+# and tagged once per container instead of on every request
+HTML_TEXT = get_html_content()
+HTML_GZIP_BASE64 = base64.b64encode(gzip.compress(HTML_TEXT.encode('utf-8'), compresslevel=9, mtime=0)).decode('ascii')
+HTML_ETAG = f'"{hashlib.sha256(HTML_TEXT.encode("utf-8")).hexdigest()[:32]}"'
+HTML_CACHE_CONTROL = 'public, max-age=300, must-revalidate'
+
+
+def html_response(event):
+    """Serve the cached page: 304 when the ETag matches, gzip when accepted
+    
+    API Gateway only decodes the base64 gzip body for clients whose Accept
+    header names text/html (the binary media type); everyone else, such as
+    a client sending Accept: */*, gets the plain text page.
+    """
+    request_headers = {name.lower(): value for name, value in (event.get('headers') or {}).items()}
+    headers = {
+        'Content-Type': 'text/html; charset=utf-8',
+        'Access-Control-Allow-Origin': '*',
+        'Cache-Control': HTML_CACHE_CONTROL,
+        'ETag': HTML_ETAG,
+        'Vary': 'Accept, Accept-Encoding'
+    }
+    
+    # Proxies may weaken the tag; a weak match is still the same page
+    if_none_match = request_headers.get('if-none-match') or ''
+    if HTML_ETAG in [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]:
+        return {'statusCode': 304, 'headers': headers, 'body': ''}
+    
+    if ('gzip' in (request_headers.get('accept-encoding') or '')
+            and 'text/html' in (request_headers.get('accept') or '')):
+        return {
+            'statusCode': 200,
+            'headers': {**headers, 'Content-Encoding': 'gzip'},
+            'body': HTML_GZIP_BASE64,
+            'isBase64Encoded': True
+        }
+    
+    return {'statusCode': 200, 'headers': headers, 'body': HTML_TEXT}
+
+
+def parse_timestamp(value):
+    """Parse an ISO timestamp; naive ones (written by the Glue job) are UTC"""
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def is_current_record(file_status, upload):
+    """Check that an object# record was written for the upload in upload#, not an earlier one
+    
+    Records written by a Glue run must come from the exact run started for
+    the upload; the queued record written on upload has no run ID yet.
+    """
+    if file_status.get('job_run_id') and upload.get('job_run_id'):
+        return file_status['job_run_id'] == upload['job_run_id']
+    written_at = file_status.get('uploaded_at') or file_status.get('leased_at')
+    if not written_at or not upload.get('uploaded_at'):
+        return True
+    return parse_timestamp(written_at) >= parse_timestamp(upload['uploaded_at'])
+
+
+def read_file_records(s3_key):
+    """Fetch a file's object# status record and upload# record in one BatchGetItem
+    
+    A status record left by an earlier upload of the same key is dropped.
+    """
+    items = dynamodb.batch_get_item(RequestItems={FILE_REGISTRY_TABLE: {
+        'Keys': [{'id': f"object#{s3_key}"}, {'id': f"upload#{s3_key}"}]
+    }})['Responses'].get(FILE_REGISTRY_TABLE, [])
+    records = {item['id']: item for item in items}
+    file_status, upload = records.get(f"object#{s3_key}", {}), records.get(f"upload#{s3_key}", {})
+    return (file_status if is_current_record(file_status, upload) else {}), upload
+
+
+def status_version(file_status, upload):
+    """Token that changes whenever the file's status, progress or cached run state does"""
+    progress = file_status.get('progress') or {}
+    return '|'.join(str(value) for value in [
+        file_status.get('status'), progress.get('updated_at'), upload.get('job_run_id'), upload.get('job_state')
+    ])
+
+
 def handle_enhanced_status_check(event):
     try:
         body = event.get('body', '{}')
         if event.get('isBase64Encoded', False):
-            import base64
             body = base64.b64decode(body).decode('utf-8')
         
         data = json.loads(body)
@@ -936,49 +1135,92 @@ def handle_enhanced_status_check(event):
             'error_records': 0
         }
         
-        # Check DynamoDB for processed records from this file FIRST
-        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
-        table = dynamodb.Table(f"foreman-{os.environ.get('ENVIRONMENT', 'dev')}-customers")
+        # Read the per-file status record the Glue job keeps up to date and the
+        # upload record holding the Glue run ID
+        file_status, upload = read_file_records(s3_key)
+        if str(upload.get('job_run_id', '')).startswith('pending_'):
+            upload = start_pending_run(s3_key, upload)
         
-        # Query DynamoDB for records from this specific file
-        response = table.scan(
-            FilterExpression='source_file = :source_file',
-            ExpressionAttributeValues={':source_file': s3_key}
-        )
+        # Long poll: when the caller already has the current version, hold the
+        # request until something changes instead of answering with the same data
+        since = data.get('since')
+        deadline = time.monotonic() + min(float(data.get('wait') or 0), STATUS_MAX_WAIT_SECONDS)
+        delay = STATUS_POLL_MIN_DELAY
+        while (since and status_version(file_status, upload) == since
+               and time.monotonic() + delay < deadline):
+            time.sleep(delay)
+            delay = min(delay * 2, STATUS_POLL_MAX_DELAY)
+            file_status, upload = read_file_records(s3_key)
         
-        records_processed = len(response['Items'])
-        successful_records = records_processed  # Assuming all records in DynamoDB are successful
-        error_records = 0  # We don't store failed records in DynamoDB currently
+        progress = file_status.get('progress') or {}
         
-        # Try to get total_records from the upload response or estimate from CSV
-        # For now, we'll use the processed count as total, but ideally we'd store this
-        total_records = records_processed  # This will be updated when we store total_records from upload
+        if file_status.get('status') in ['completed', 'failed', 'skipped']:
+            successful_records = int(file_status.get('successful_records', 0))
+            error_records = int(file_status.get('error_records', 0))
+        else:
+            successful_records = int(progress.get('rows_written', 0))
+            error_records = int(progress.get('rows_rejected', 0)) + int(progress.get('rows_duplicate', 0))
+        records_processed = successful_records
+        total_records = (int(progress.get('rows_read', 0)) or int(upload.get('total_records', 0))
+                         or records_processed + error_records)
         
-        # Now check Glue job status
+        response_data['file_status'] = file_status.get('status')
+        response_data['progress'] = {
+            'stage': progress.get('stage'),
+            'throughput': int(progress.get('throughput', 0)),
+            'throughput_unit': progress.get('throughput_unit'),
+            'eta_seconds': int(progress['eta_seconds']) if 'eta_seconds' in progress else None,
+            'updated_at': progress.get('updated_at')
+        }
+        
+        # Now check the Glue run started for this upload
+        job_status = 'UNKNOWN'
+        # The upload record is authoritative: a pending ID the client holds may have started since
+        job_run_id = upload.get('job_run_id') or data.get('job_run_id')
         try:
-            glue = boto3.client('glue', region_name='us-east-1')
-            job_name = f"foreman-{os.environ.get('ENVIRONMENT', 'dev')}-csv-processing-job"
-            
-            # Get the most recent job run
-            response = glue.get_job_runs(JobName=job_name, MaxResults=5)
-            job_status = 'UNKNOWN'
-            job_run_id = None
             job_metrics = {}
+            job_run = None
             
-            if response['JobRuns']:
-                # Get the most recent job run
-                most_recent_job = response['JobRuns'][0]  # Jobs are sorted by start time descending
-                job_status = most_recent_job.get('JobRunState', 'UNKNOWN')
-                job_run_id = most_recent_job.get('JobRunId', None)
+            if upload.get('job_state') in TERMINAL_JOB_STATES and upload.get('job_run_id') == job_run_id:
+                # Finished runs never change, so no Glue call is needed
+                job_run = {
+                    'JobRunState': upload['job_state'],
+                    'StartedOn': datetime.fromisoformat(upload['job_started_on']) if upload.get('job_started_on') else None,
+                    'CompletedOn': datetime.fromisoformat(upload['job_completed_on']) if upload.get('job_completed_on') else None,
+                    'MaxCapacity': float(upload.get('job_max_capacity', 0))
+                }
+            elif job_run_id and job_run_id.startswith('pending_'):
+                job_status = 'PENDING'
+            elif job_run_id:
+                job_run = glue.get_job_run(JobName=GLUE_JOB_NAME, RunId=job_run_id)['JobRun']
+                
+                if job_run.get('JobRunState') in TERMINAL_JOB_STATES and upload.get('job_run_id') == job_run_id:
+                    file_registry.update_item(
+                        Key={'id': f"upload#{s3_key}"},
+                        UpdateExpression=('SET job_state = :state, job_started_on = :started, '
+                                          'job_completed_on = :completed, job_max_capacity = :capacity'),
+                        ConditionExpression='job_run_id = :job_run_id',
+                        ExpressionAttributeValues={
+                            ':state': job_run['JobRunState'],
+                            ':started': job_run['StartedOn'].isoformat() if job_run.get('StartedOn') else None,
+                            ':completed': job_run['CompletedOn'].isoformat() if job_run.get('CompletedOn') else None,
+                            ':capacity': Decimal(str(job_run.get('MaxCapacity', 0))),
+                            ':job_run_id': job_run_id
+                        }
+                    )
+                    upload['job_state'] = job_run['JobRunState']
+            
+            if job_run:
+                job_status = job_run.get('JobRunState', 'UNKNOWN')
                 
                 # Calculate actual duration from job run data
-                if most_recent_job.get('StartedOn') and most_recent_job.get('CompletedOn'):
-                    duration = (most_recent_job['CompletedOn'] - most_recent_job['StartedOn']).total_seconds()
+                if job_run.get('StartedOn') and job_run.get('CompletedOn'):
+                    duration = (job_run['CompletedOn'] - job_run['StartedOn']).total_seconds()
                     job_metrics['duration'] = f"{duration:.1f}s"
-                elif most_recent_job.get('StartedOn'):
+                elif job_run.get('StartedOn'):
                     # Make sure both datetimes are timezone-aware
                     now = datetime.now(timezone.utc)
-                    started_on = most_recent_job['StartedOn']
+                    started_on = job_run['StartedOn']
                     if started_on.tzinfo is None:
                         started_on = started_on.replace(tzinfo=timezone.utc)
                     duration = (now - started_on).total_seconds()
@@ -987,7 +1229,7 @@ def handle_enhanced_status_check(event):
                     job_metrics['duration'] = '--'
                 
                 # Get actual DPU usage from job run
-                job_metrics['dpu_usage'] = f"{most_recent_job.get('MaxCapacity', 0)} DPU"
+                job_metrics['dpu_usage'] = f"{job_run.get('MaxCapacity', 0)} DPU"
                 job_metrics['memory_usage'] = '4GB+'
                 
                 # Calculate real processing speed
@@ -1014,8 +1256,20 @@ def handle_enhanced_status_check(event):
                 'message': f'⚠️ Could not check Glue job status: {str(e)}'
             })
         
-        # Determine processing status based on Glue job status and DynamoDB records
-        if job_status in ['SUCCEEDED', 'STOPPED']:
+        # Determine processing status; the file's own record wins over the job state
+        if file_status.get('status') == 'completed':
+            status = 'processed'
+            success = True
+            response_data['message'] = f'✅ Processing complete! {records_processed} records processed successfully.'
+        elif file_status.get('status') == 'skipped':
+            status = 'processed'
+            success = True
+            response_data['message'] = f"⚠️ {file_status.get('message', 'File was skipped')}."
+        elif file_status.get('status') == 'failed':
+            status = 'failed'
+            success = False
+            response_data['message'] = f"❌ Processing failed: {file_status.get('error', 'unknown error')}"
+        elif job_status in ['SUCCEEDED', 'STOPPED']:
             if records_processed > 0:
                 status = 'processed'
                 success = True
@@ -1038,6 +1292,7 @@ def handle_enhanced_status_check(event):
             response_data['message'] = f'⏳ Job status: {job_status} - {records_processed} records processed so far.'
         
         response_data.update({
+            'version': status_version(file_status, upload),
             'processed': status in ['processed', 'failed'],
             'success': success,
             's3_key': s3_key,
@@ -1068,12 +1323,248 @@ def handle_enhanced_status_check(event):
             'body': json.dumps({'error': str(e)})
         }
 
-def handle_glue_upload(event):
+def start_glue_run(s3_key):
+    """Start the Glue job for one object, or return None at the concurrent run limit"""
+    try:
+        response = glue.start_job_run(
+            JobName=GLUE_JOB_NAME,
+            Arguments={'--s3_keys': s3_key}
+        )
+    except Exception as glue_error:
+        if 'ConcurrentRunsExceededException' in str(glue_error):
+            return None
+        raise glue_error
+    return response['JobRunId']
+
+
+def start_pending_run(s3_key, upload):
+    """Retry starting the Glue run of an upload that hit the concurrent run limit
+    
+    Status checks call this while the upload still has a pending_ ID. The
+    conditional update lets only one check record the run it started; a
+    second run started by a racing check finds the file leased and skips it.
+    """
+    job_run_id = start_glue_run(s3_key)
+    if not job_run_id:
+        return upload
+    
+    try:
+        file_registry.update_item(
+            Key={'id': f"upload#{s3_key}"},
+            UpdateExpression='SET job_run_id = :job_run_id',
+            ConditionExpression='job_run_id = :pending',
+            ExpressionAttributeValues={':job_run_id': job_run_id, ':pending': upload['job_run_id']}
+        )
+    except file_registry.meta.client.exceptions.ConditionalCheckFailedException:
+        return read_file_records(s3_key)[1]
+    return {**upload, 'job_run_id': job_run_id}
+
+
+def reset_file_status(s3_key, uploaded_at):
+    """Replace the object# record of an earlier upload of this key with a queued one
+    
+    A record still leased by a running job is left alone; it predates
+    uploaded_at, so status checks ignore it.
+    """
+    try:
+        file_registry.put_item(
+            Item={
+                'id': f"object#{s3_key}",
+                'source_file': s3_key,
+                'status': 'queued',
+                'uploaded_at': uploaded_at
+            },
+            ConditionExpression='attribute_not_exists(id) OR #status <> :processing OR lease_expires_at < :now',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={':processing': 'processing', ':now': datetime.now().isoformat()}
+        )
+    except file_registry.meta.client.exceptions.ConditionalCheckFailedException:
+        pass
+
+
+def start_processing(s3_key, total_records=None):
+    """Start the Glue job for an uploaded file and record its run ID
+    
+    At the concurrent run limit the upload is recorded with a pending_ ID
+    and the run is started by a later status check.
+    """
+    # Reset the file's status before the run can lease it
+    uploaded_at = datetime.now(timezone.utc).isoformat()
+    reset_file_status(s3_key, uploaded_at)
+    job_run_id = start_glue_run(s3_key) or f"pending_{uuid.uuid4()}"
+    
+    # Remember which Glue run belongs to this upload for status checks
+    upload = {
+        'id': f"upload#{s3_key}",
+        's3_key': s3_key,
+        'job_run_id': job_run_id,
+        'uploaded_at': uploaded_at
+    }
+    if total_records is not None:
+        upload['total_records'] = total_records
+    file_registry.put_item(Item=upload)
+    return job_run_id
+
+
+def read_json_body(event):
+    """Decode the JSON request body (API Gateway may base64-encode it)"""
+    body = event.get('body') or '{}'
+    if event.get('isBase64Encoded', False):
+        body = base64.b64decode(body).decode('utf-8')
+    return json.loads(body)
+
+
+def json_response(status_code, payload):
+    """JSON API response with the CORS header every endpoint sends"""
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*'
+        },
+        'body': json.dumps(payload)
+    }
+
+
+def upload_key(filename):
+    """Object key for an upload; the timestamp and random suffix keep same-name uploads apart
+    
+    Keys stay in the bucket root, where the Glue job and S3 pipeline look for input.
+    """
+    name = os.path.basename(filename or '')
+    return f"{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}-{name}"
+
+
+def find_registered_upload(data):
+    """Get the upload# record registered at upload-init for this request, or None
+    
+    The key, upload ID and token must all match what upload-init issued.
+    """
+    s3_key, upload_id, token = data.get('key'), data.get('upload_id'), data.get('upload_token')
+    if not s3_key or not upload_id or not token:
+        return None
+    upload = file_registry.get_item(Key={'id': f"upload#{s3_key}"}, ConsistentRead=True).get('Item') or {}
+    if (upload.get('status') != 'uploading' or upload.get('upload_id') != upload_id
+            or not hmac.compare_digest(str(upload.get('upload_token', '')), str(token))):
+        return None
+    return upload
+
+
+def handle_upload_init(event):
+    """Start a multipart upload, register it and presign a PUT URL for every part"""
+    try:
+        data = read_json_body(event)
+        filename = os.path.basename(data.get('filename') or '')
+        size = int(data.get('size') or 0)
+        
+        if not filename.lower().endswith('.csv'):
+            return json_response(400, {'error': 'Please select a CSV file'})
+        if size < 0:
+            return json_response(400, {'error': 'Invalid file size'})
+        
+        s3_key = upload_key(filename)
+        upload_token = secrets.token_urlsafe(32)
+        
+        part_size = max(UPLOAD_MIN_PART_SIZE, math.ceil(size / UPLOAD_MAX_PARTS))
+        part_count = max(1, math.ceil(size / part_size))
+        
+        upload_id = s3.create_multipart_upload(
+            Bucket=UPLOAD_BUCKET,
+            Key=s3_key,
+            ContentType='text/csv'
+        )['UploadId']
+        
+        # Only the client holding this token can complete or abort the upload
+        file_registry.put_item(Item={
+            'id': f"upload#{s3_key}",
+            's3_key': s3_key,
+            'status': 'uploading',
+            'upload_id': upload_id,
+            'upload_token': upload_token,
+            'size': size,
+            'created_at': datetime.now(timezone.utc).isoformat()
+        })
+        
+        parts = [{
+            'part_number': part_number,
+            'url': s3.generate_presigned_url(
+                'upload_part',
+                Params={'Bucket': UPLOAD_BUCKET, 'Key': s3_key, 'UploadId': upload_id, 'PartNumber': part_number},
+                ExpiresIn=UPLOAD_URL_EXPIRES_SECONDS
+            )
+        } for part_number in range(1, part_count + 1)]
+        
+        return json_response(200, {
+            'key': s3_key,
+            'upload_id': upload_id,
+            'upload_token': upload_token,
+            'part_size': part_size,
+            'parts': parts
+        })
+        
+    except Exception as e:
+        return json_response(500, {'error': str(e)})
+
+
+def handle_upload_complete(event):
+    """Assemble the uploaded parts, check the result and start processing the file"""
     try:
-        import base64
-        import hashlib
-        import uuid
+        data = read_json_body(event)
+        s3_key = data.get('key')
+        upload_id = data.get('upload_id')
+        parts = data.get('parts') or []
+        
+        if not s3_key or not upload_id or not parts:
+            return json_response(400, {'error': 'Missing key, upload_id or parts'})
+        
+        upload = find_registered_upload(data)
+        if not upload:
+            return json_response(403, {'error': 'Unknown upload or invalid upload token'})
+        
+        s3.complete_multipart_upload(
+            Bucket=UPLOAD_BUCKET,
+            Key=s3_key,
+            UploadId=upload_id,
+            MultipartUpload={'Parts': sorted(
+                ({'PartNumber': int(part['PartNumber']), 'ETag': part['ETag']} for part in parts),
+                key=lambda part: part['PartNumber']
+            )}
+        )
+        
+        # The assembled object must be exactly the file announced at upload-init
+        size = s3.head_object(Bucket=UPLOAD_BUCKET, Key=s3_key)['ContentLength']
+        if size != int(upload['size']):
+            s3.delete_object(Bucket=UPLOAD_BUCKET, Key=s3_key)
+            return json_response(400, {'error': f"Uploaded {size} bytes, expected {int(upload['size'])}"})
+        
+        job_run_id = start_processing(s3_key)
+        
+        return json_response(200, {
+            'success': True,
+            'message': 'File uploaded and Glue job started successfully',
+            'filename': s3_key,
+            'job_run_id': job_run_id,
+            'processing_method': 'AWS Glue with Enhanced Progress Tracking'
+        })
         
+    except Exception as e:
+        return json_response(500, {'error': str(e)})
+
+
+def handle_upload_abort(event):
+    """Abort a multipart upload so its parts stop accruing storage"""
+    try:
+        data = read_json_body(event)
+        if not find_registered_upload(data):
+            return json_response(403, {'error': 'Unknown upload or invalid upload token'})
+        s3.abort_multipart_upload(Bucket=UPLOAD_BUCKET, Key=data['key'], UploadId=data['upload_id'])
+        return json_response(200, {'success': True})
+    except Exception as e:
+        return json_response(500, {'error': str(e)})
+
+
+def handle_glue_upload(event):
+    try:
         body = event.get('body', '{}')
         if event.get('isBase64Encoded', False):
             body = base64.b64decode(body).decode('utf-8')
@@ -1111,31 +1602,16 @@ def handle_glue_upload(event):
                 'body': json.dumps({'error': f'Invalid CSV data: {str(e)}'})
             }
         
-        s3 = boto3.client('s3')
-        bucket_name = f'foreman-{os.environ.get("ENVIRONMENT", "dev")}-csv-uploads'
-        s3_key = filename
+        s3_key = upload_key(filename)
         
         s3.put_object(
-            Bucket=bucket_name,
+            Bucket=UPLOAD_BUCKET,
             Key=s3_key,
             Body=csv_content,
             ContentType='text/csv'
         )
         
-        glue = boto3.client('glue', region_name='us-east-1')
-        job_name = f"foreman-{os.environ.get('ENVIRONMENT', 'dev')}-csv-processing-job"
-        job_run_id = str(uuid.uuid4())
-        
-        try:
-            response = glue.start_job_run(
-                JobName=job_name
-            )
-            job_run_id = response['JobRunId']
-        except Exception as glue_error:
-            if 'ConcurrentRunsExceededException' in str(glue_error):
-                job_run_id = f"pending_{job_run_id}"
-            else:
-                raise glue_error
+        job_run_id = start_processing(s3_key, total_records)
         
         return {
             'statusCode': 200,
@@ -1146,7 +1622,7 @@ def handle_glue_upload(event):
             'body': json.dumps({
                 'success': True,
                 'message': 'File uploaded and Glue job started successfully',
-                'filename': filename,
+                'filename': s3_key,
                 'job_run_id': job_run_id,
                 'total_records': total_records,
                 'processing_method': 'AWS Glue with Enhanced Progress Tracking',
@@ -11,16 +11,35 @@ load_dotenv()
 
 from models.registry import ModelRegistry
 from gql_client import GraphQLClient
+from checkpoint import CheckpointJournal, file_hash, row_keys
+
+
+class CSVReadError(Exception):
+    """The CSV could not be read past the preview rows"""
+
+
+def read_chunks(path, chunk_size=None, usecols=None):
+    """Yield CSV contents as DataFrames of at most chunk_size rows (whole file if None)
+    
+    Parse, decoding and usecols errors anywhere in the file are raised as CSVReadError.
+    """
+    try:
+        if chunk_size:
+            yield from pd.read_csv(path, chunksize=chunk_size, usecols=usecols)
+        else:
+            yield pd.read_csv(path, usecols=usecols)
+    except (pd.errors.ParserError, UnicodeDecodeError, ValueError) as e:
+        raise CSVReadError(e) from e
 
 
 def preview_file(path):
-    """Preview CSV file contents"""
+    """Preview CSV file contents (only the first rows are read)"""
     if not os.path.exists(path):
         print(f"❌ File not found: {path}")
         return None
 
     try:
-        df = pd.read_csv(path)
+        df = pd.read_csv(path, nrows=5)
         print("✅ CSV Loaded.\n")
         print("📊 Preview (first 5 rows):")
         print(df.head(), "\n")
@@ -33,6 +52,61 @@ def preview_file(path):
         return None
 
 
+def validate_chunk(model, mapped_df):
+    """Print validation errors for a mapped chunk and return the failing row count"""
+    _, row_errors = model.validate_frame(mapped_df)
+    for idx, errors in row_errors.items():
+        print(f"\n❌ Row {idx + 1} errors:")
+        for err in errors:
+            print(f"  - {err}")
+    return len(row_errors)
+
+
+def submit_chunk(client, model, mapped_df, concurrency=1, batch_size=1, journal=None):
+    """Validate and submit a mapped chunk, returning (success_count, error_count, skipped_count)"""
+    success_count = 0
+    error_count = 0
+    skipped_count = 0
+    
+    # Validate all rows up front
+    _, row_errors = model.validate_frame(mapped_df)
+    
+    # Rows confirmed by an earlier run are skipped when resuming
+    keys = row_keys(model, mapped_df) if journal else None
+    done = set(keys[keys.map(journal.is_confirmed)].index) if journal else set()
+    
+    # Valid rows are submitted concurrently; results come back in row order
+    valid_rows = (row for idx, row in mapped_df.iterrows()
+                  if idx not in row_errors and idx not in done)
+    results = client.submit_records(model, valid_rows, concurrency, batch_size)
+    
+    for idx in mapped_df.index:
+        errors = row_errors.get(idx)
+        if errors:
+            error_count += 1
+            print(f"⛔ Skipping row {idx + 1} due to validation errors:")
+            for err in errors:
+                print(f"  - {err}")
+            continue
+        
+        if idx in done:
+            skipped_count += 1
+            print(f"⏭️ Row {idx + 1}: already submitted with ID {journal.get_record_id(keys[idx]) or 'N/A'}")
+            continue
+        
+        success, result = next(results)
+        if success:
+            success_count += 1
+            if journal:
+                journal.record(keys[idx], result.get('id'))
+            print(f"✅ Row {idx + 1}: {model.name.title()} created with ID {result.get('id', 'N/A')}")
+        else:
+            error_count += 1
+            print(f"❌ Row {idx + 1}: {result}")
+    
+    return success_count, error_count, skipped_count
+
+
 def main():
     parser = argparse.ArgumentParser(description="🛠️ Foreman v2 - Scalable Data Onboarding CLI")
     parser.add_argument('--file', help="Path to CSV file")
@@ -40,11 +114,24 @@ def main():
     parser.add_argument('--dry-run', action='store_true', help="Run validation only")
     parser.add_argument('--submit', action='store_true', help="Submit to GraphQL")
     parser.add_argument('--list-models', action='store_true', help="List available models")
+    parser.add_argument('--chunk-size', type=int, help="Stream the CSV in chunks of N rows instead of loading it whole")
+    parser.add_argument('--concurrency', type=int, default=1, help="Number of requests to submit in parallel (default: 1)")
+    parser.add_argument('--batch-size', type=int, default=1, help="Rows per batched GraphQL mutation (default: 1)")
+    parser.add_argument('--max-retries', type=int, default=8, help="Retries per request when throttled or unable to connect (default: 8)")
+    parser.add_argument('--resume', action='store_true', help="Skip rows already confirmed by a previous --submit run of the same file")
+    parser.add_argument('--checkpoint-dir', default='.foreman', help="Directory for submit checkpoint journals (default: .foreman)")
     args = parser.parse_args()
 
+    if args.concurrency < 1:
+        parser.error("--concurrency must be a positive integer")
+    if args.batch_size < 1:
+        parser.error("--batch-size must be a positive integer")
+    if args.max_retries < 0:
+        parser.error("--max-retries cannot be negative")
+
     # Initialize registry and client
     registry = ModelRegistry()
-    client = GraphQLClient()
+    client = GraphQLClient(max_connections=args.concurrency, max_retries=args.max_retries)
 
     # List models if requested
     if args.list_models:
@@ -58,16 +145,19 @@ def main():
     if not args.file:
         parser.error("--file is required unless --list-models is specified")
 
+    if args.chunk_size is not None and args.chunk_size < 1:
+        parser.error("--chunk-size must be a positive integer")
+
     print(f"📂 Loading file: {args.file}")
     df = preview_file(args.file)
     if df is None:
         return
 
-    # Auto-detect or validate model
+    # Auto-detect or validate model (only the header is needed)
     if args.model:
-        is_valid, model, message = registry.validate_csv(df, args.model)
+        is_valid, model, message = registry.validate_csv(df.columns, args.model)
     else:
-        is_valid, model, message = registry.validate_csv(df)
+        is_valid, model, message = registry.validate_csv(df.columns)
     
     print(f"\n🔍 Model Detection: {message}")
     
@@ -80,24 +170,34 @@ def main():
         return
 
     print(f"✅ Using model: {model.name}")
+    if args.submit and args.batch_size > 1 and not (model.mutation_field and model.input_type):
+        print(f"❌ Model '{model.name}' does not define mutation_field/input_type, so --batch-size must be 1")
+        return
 
-    # Map fields using the detected model
+    # Map fields using the detected model, reading only the columns it needs
     print("\n🔁 Mapping fields...")
-    mapped_df = model.map_fields(df)
+    usecols = model.get_source_columns(df.columns)
+    print(f"📥 Reading {len(usecols)} of {len(df.columns)} column(s): {', '.join(usecols)}")
     print("🗺️ Columns after mapping:")
-    print(mapped_df.columns)
+    print(model.map_fields(df).columns)
+    if args.chunk_size:
+        print(f"🌊 Streaming in chunks of {args.chunk_size} rows")
+
+    def mapped_chunks():
+        # Chunk indexes continue across the file, so row numbers stay global
+        for chunk in read_chunks(args.file, args.chunk_size, usecols or None):
+            yield model.map_fields(chunk)
 
     # Validation and submission
     if args.dry_run:
         print("\n🔎 Validating rows...")
         error_count = 0
-        for idx, row in mapped_df.iterrows():
-            errors = model.validate_row(row)
-            if errors:
-                error_count += 1
-                print(f"\n❌ Row {idx + 1} errors:")
-                for err in errors:
-                    print(f"  - {err}")
+        try:
+            for chunk_df in mapped_chunks():
+                error_count += validate_chunk(model, chunk_df)
+        except CSVReadError as e:
+            print(f"❌ Failed to load CSV: {e}")
+            return
 
         if error_count == 0:
             print("✅ All rows passed validation.")
@@ -108,30 +208,43 @@ def main():
         print("\n🚀 Submit mode: Submitting to GraphQL...")
         success_count = 0
         error_count = 0
+        skipped_count = 0
+        total_count = 0
+        
+        # Every submit run journals confirmed rows so it can be resumed later
+        journal = CheckpointJournal(args.checkpoint_dir, file_hash(args.file), resume=args.resume)
+        if args.resume:
+            print(f"♻️ Resuming: {len(journal.confirmed)} row(s) already confirmed in {journal.path}")
         
-        for idx, row in mapped_df.iterrows():
-            # Validate first
-            errors = model.validate_row(row)
-            if errors:
-                error_count += 1
-                print(f"⛔ Skipping row {idx + 1} due to validation errors:")
-                for err in errors:
-                    print(f"  - {err}")
-                continue
-            
-            # Submit to GraphQL using the model
-            success, result = client.submit_record(model, row)
-            if success:
-                success_count += 1
-                print(f"✅ Row {idx + 1}: {model.name.title()} created with ID {result.get('id', 'N/A')}")
-            else:
-                error_count += 1
-                print(f"❌ Row {idx + 1}: {result}")
+        try:
+            for chunk_df in mapped_chunks():
+                chunk_success, chunk_errors, chunk_skipped = submit_chunk(
+                    client, model, chunk_df, args.concurrency, args.batch_size, journal
+                )
+                success_count += chunk_success
+                error_count += chunk_errors
+                skipped_count += chunk_skipped
+                total_count += len(chunk_df)
+        except CSVReadError as e:
+            print(f"❌ Failed to load CSV: {e}")
+            if success_count:
+                print(f"♻️ {success_count} row(s) were submitted before the error; fix the file and rerun with --resume")
+            return
+        finally:
+            journal.close()
         
         print(f"\n📊 Submission Summary:")
         print(f"  ✅ Successful: {success_count}")
         print(f"  ❌ Failed: {error_count}")
-        print(f"  📈 Total: {len(mapped_df)}")
+        if args.resume:
+            print(f"  ⏭️ Already submitted: {skipped_count}")
+        print(f"  📈 Total: {total_count}")
+        
+        stats = client.throttle.summary()
+        print(f"  🔁 Retries: {stats['retries']} ({stats['throttled']} throttled responses)")
+        print(f"  🔥 Server errors: {stats['server_errors']}, connection errors: {stats['connection_errors']}")
+        print(f"  ⏳ Backoff time: {stats['backoff_seconds']:.1f}s")
+        print(f"  ⚡ Request rate: {stats['request_rate']:.1f} req/s over {stats['requests']} request(s)")
 
 
 if __name__ == "__main__":
@@ -5,44 +5,128 @@ Base model class for all data types in Foreman
 
 from abc import ABC, abstractmethod
 from typing import Dict, Any, List, Tuple, Optional
+import numpy as np
 import pandas as pd
+from .validators import compile_schema, column_present, is_present
 
 
 class BaseModel(ABC):
     """Base class for all data models"""
     
+    # GraphQL create mutation details, used to build batched documents
+    mutation_field: str = ''
+    input_type: str = ''
+    result_fields: List[str] = ['id']
+    
+    # Lowercase column names that identify this model's CSVs and how many must
+    # match; without patterns, every required field must be present
+    detection_patterns: List[str] = []
+    min_pattern_matches: int = 0
+    
+    # CSV column -> schema field aliases applied by map_fields
+    field_mappings: Dict[str, str] = {}
+    
     def __init__(self, name: str, schema: Dict[str, str]):
         self.name = name
         self.schema = schema
         self.required_fields = [field for field, config in schema.items() 
                               if config.get('required', False)]
+        self.field_validators = compile_schema(schema)
     
     @abstractmethod
     def validate_row(self, row: pd.Series) -> List[str]:
         """Validate a single row of data"""
         pass
     
-    @abstractmethod
+    def get_field_sources(self, columns) -> Dict[str, str]:
+        """Resolve which CSV column feeds each schema field
+        
+        A field is read from its own column unless one of its field_mappings
+        aliases is present; like the original copy-based mapping, later
+        aliases win.
+        """
+        available = set(columns)
+        sources = {field: field for field in self.schema if field in available}
+        for csv_col, schema_field in self.field_mappings.items():
+            if csv_col in available:
+                sources[schema_field] = csv_col
+        return sources
+    
+    def get_source_columns(self, columns) -> List[str]:
+        """CSV columns needed for this model, e.g. for read_csv(usecols=...)"""
+        return list(dict.fromkeys(self.get_field_sources(columns).values()))
+    
     def map_fields(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Map CSV columns to internal schema"""
-        pass
+        """Map CSV columns to internal schema
+        
+        Only the columns that feed schema fields are kept and renamed, so the
+        result scales with the schema rather than the CSV width.
+        """
+        sources = self.get_field_sources(df.columns)
+        if len(set(sources.values())) == len(sources):
+            mapped_df = df[list(sources.values())]
+            mapped_df.columns = list(sources.keys())
+        else:
+            # One CSV column feeds several fields
+            mapped_df = pd.DataFrame({field: df[col] for field, col in sources.items()}, index=df.index)
+        
+        # Ensure all required fields exist
+        missing = {field: None for field in self.required_fields if field not in mapped_df.columns}
+        if missing:
+            mapped_df = mapped_df.assign(**missing)
+        
+        return mapped_df
     
     @abstractmethod
     def create_mutation(self, row: pd.Series) -> Tuple[str, Dict[str, Any]]:
         """Create GraphQL mutation for this data type"""
         pass
     
+    def get_mutation_input(self, row: pd.Series) -> Dict[str, Any]:
+        """Build the mutation input for a row (defaults to every schema field)"""
+        return {field: row.get(field) for field in self.schema}
+    
+    def create_batch_mutation(self, rows: List[pd.Series]) -> Tuple[str, Dict[str, Any]]:
+        """Create one GraphQL document that creates every row
+        
+        Row i is sent as alias ``r{i}`` with variable ``$input{i}``, so results
+        and errors can be mapped back to the row they belong to.
+        """
+        if not self.mutation_field or not self.input_type:
+            raise ValueError(f"Model '{self.name}' must set mutation_field and input_type to batch mutations")
+        
+        selection = ' '.join(self.result_fields)
+        params = ', '.join(f"$input{i}: {self.input_type}!" for i in range(len(rows)))
+        fields = '\n'.join(f"  r{i}: {self.mutation_field}(input: $input{i}) {{ {selection} }}"
+                           for i in range(len(rows)))
+        operation = self.mutation_field[0].upper() + self.mutation_field[1:] + 'Batch'
+        mutation = f"mutation {operation}({params}) {{\n{fields}\n}}"
+        
+        variables = {f"input{i}": self.get_mutation_input(row) for i, row in enumerate(rows)}
+        return mutation, variables
+    
     @abstractmethod
     def get_query(self, id: str) -> Tuple[str, Dict[str, Any]]:
         """Create GraphQL query for this data type"""
         pass
     
+    def get_detection_patterns(self) -> Tuple[List[str], int]:
+        """Get the column patterns and minimum match count used for detection"""
+        if self.detection_patterns:
+            return [p.lower() for p in self.detection_patterns], self.min_pattern_matches
+        # Default - every required field must be present
+        required_lower = [field.lower() for field in self.required_fields]
+        return required_lower, len(required_lower)
+    
+    def detect_from_columns(self, columns) -> bool:
+        """Detect if this model matches a CSV header"""
+        csv_columns = {str(col).lower() for col in columns}
+        patterns, min_matches = self.get_detection_patterns()
+        return sum(1 for pattern in patterns if pattern in csv_columns) >= min_matches
+    
     def detect_from_csv(self, df: pd.DataFrame) -> bool:
         """Detect if this model matches the CSV structure"""
-        # Default implementation - check if required fields are present
-        csv_columns = set(df.columns.str.lower())
-        required_lower = {field.lower() for field in self.required_fields}
-        return required_lower.issubset(csv_columns)
+        return self.detect_from_columns(df.columns)
     
     def get_validation_errors(self, row: pd.Series) -> List[str]:
         """Get validation errors for a row"""
@@ -50,7 +134,60 @@ class BaseModel(ABC):
         
         # Check required fields
         for field in self.required_fields:
-            if pd.isna(row.get(field)) or str(row.get(field)).strip() == '':
+            if not is_present(row.get(field)):
                 errors.append(f"Required field '{field}' is missing or empty")
         
-        return errors 
\ No newline at end of file
+        # Check field types declared in the schema
+        for validator in self.field_validators:
+            value = row.get(validator.field)
+            if is_present(value) and not validator.is_valid(value):
+                errors.append(validator.message)
+        
+        return errors
+    
+    def get_frame_validation_errors(self, df: pd.DataFrame) -> List[Tuple[pd.Series, str]]:
+        """Get column-wise validation rules as (error mask, message) pairs.
+        
+        Mirrors get_validation_errors for a whole DataFrame. Subclasses that add
+        checks to validate_row should extend this list in the same order.
+        """
+        rules = []
+        
+        # Check required fields
+        for field in self.required_fields:
+            missing = ~column_present(self._column(df, field))
+            rules.append((missing, f"Required field '{field}' is missing or empty"))
+        
+        # Check field types declared in the schema
+        for validator in self.field_validators:
+            rules.append((validator.invalid_mask(self._column(df, validator.field)), validator.message))
+        
+        return rules
+    
+    def validate_frame(self, df: pd.DataFrame) -> Tuple[pd.Series, Dict[Any, List[str]]]:
+        """Validate all rows at once.
+        
+        Returns a boolean mask of rows with errors and a dict mapping each
+        failing row's index label to its messages, in the same order that
+        validate_row would report them.
+        """
+        rules = self.get_frame_validation_errors(df)
+        if not rules:
+            return pd.Series(False, index=df.index), {}
+        
+        masks = np.column_stack([mask.to_numpy(dtype=bool) for mask, _ in rules])
+        messages = [message for _, message in rules]
+        error_mask = masks.any(axis=1)
+        
+        errors = {}
+        for pos in np.flatnonzero(error_mask):
+            errors[df.index[pos]] = [messages[i] for i in np.flatnonzero(masks[pos])]
+        
+        return pd.Series(error_mask, index=df.index), errors
+    
+    @staticmethod
+    def _column(df: pd.DataFrame, field: str) -> pd.Series:
+        """Get a column, or an all-missing column if the field is absent"""
+        if field in df.columns:
+            return df[field]
+        return pd.Series(None, index=df.index, dtype=object)
\ No newline at end of file
@@ -6,11 +6,37 @@ Project data model for Foreman
 from typing import Dict, Any, List, Tuple
 import pandas as pd
 from .base import BaseModel
+from .validators import column_text, parse_date, parse_dates
 
 
 class ProjectModel(BaseModel):
     """Project data model"""
     
+    mutation_field = 'createProject'
+    input_type = 'ProjectInput'
+    result_fields = ['id', 'name', 'description', 'startDate', 'endDate', 'status', 'budget']
+    
+    # Common project column names; 2 or more matches suggest a project CSV
+    detection_patterns = [
+        'project_name', 'name', 'title',
+        'project_description', 'description', 'desc',
+        'start_date', 'end_date', 'deadline',
+        'project_status', 'status', 'state',
+        'project_budget', 'budget', 'cost'
+    ]
+    min_pattern_matches = 2
+    
+    # Standard field mappings
+    field_mappings = {
+        'project_name': 'name',
+        'project_description': 'description',
+        'start_date': 'startDate',
+        'end_date': 'endDate',
+        'project_status': 'status',
+        'project_budget': 'budget',
+        'customer_id': 'customerId'
+    }
+    
     def __init__(self):
         schema = {
             'name': {'required': True, 'type': 'string'},
@@ -25,48 +51,28 @@ class ProjectModel(BaseModel):
     
     def validate_row(self, row: pd.Series) -> List[str]:
         """Validate project data"""
+        # Budget and date formats are checked from the schema types
         errors = self.get_validation_errors(row)
         
-        # Budget validation
-        budget = row.get('budget', '')
-        if budget and not str(budget).replace('.', '').replace(',', '').isdigit():
-            errors.append("Invalid budget format")
-        
-        # Date validation (basic)
-        start_date = row.get('startDate', '')
-        end_date = row.get('endDate', '')
-        if start_date and end_date and start_date > end_date:
+        # Date order validation
+        start_date = parse_date(row.get('startDate', ''))
+        end_date = parse_date(row.get('endDate', ''))
+        if not pd.isna(start_date) and not pd.isna(end_date) and start_date > end_date:
             errors.append("Start date cannot be after end date")
         
         return errors
     
-    def map_fields(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Map CSV columns to project schema"""
-        # Create a copy to avoid modifying original
-        mapped_df = df.copy()
-        
-        # Standard field mappings
-        field_mappings = {
-            'project_name': 'name',
-            'project_description': 'description',
-            'start_date': 'startDate',
-            'end_date': 'endDate',
-            'project_status': 'status',
-            'project_budget': 'budget',
-            'customer_id': 'customerId'
-        }
-        
-        # Apply mappings
-        for csv_col, schema_field in field_mappings.items():
-            if csv_col in mapped_df.columns:
-                mapped_df[schema_field] = mapped_df[csv_col]
+    def get_frame_validation_errors(self, df: pd.DataFrame) -> List[Tuple[pd.Series, str]]:
+        """Column-wise project validation, matching validate_row"""
+        rules = super().get_frame_validation_errors(df)
         
-        # Ensure all required fields exist
-        for field in self.required_fields:
-            if field not in mapped_df.columns:
-                mapped_df[field] = None
+        # Date order validation
+        start_date = parse_dates(column_text(self._column(df, 'startDate')))
+        end_date = parse_dates(column_text(self._column(df, 'endDate')))
+        rules.append((start_date.notna() & end_date.notna() & (start_date > end_date),
+                      "Start date cannot be after end date"))
         
-        return mapped_df
+        return rules
     
     def create_mutation(self, row: pd.Series) -> Tuple[str, Dict[str, Any]]:
         """Create GraphQL mutation for project"""
@@ -85,35 +91,21 @@ class ProjectModel(BaseModel):
         """
         
         variables = {
-            "input": {
-                "name": row.get("name"),
-                "description": row.get("description"),
-                "startDate": row.get("startDate"),
-                "endDate": row.get("endDate"),
-                "status": row.get("status"),
-                "budget": row.get("budget")
-            }
+            "input": self.get_mutation_input(row)
         }
         
         return mutation, variables
     
-    def detect_from_csv(self, df: pd.DataFrame) -> bool:
-        """Detect if this model matches the CSV structure"""
-        # Check for project-specific field patterns
-        csv_columns = set(df.columns.str.lower())
-        
-        # Look for common project field patterns
-        project_patterns = [
-            'project_name', 'name', 'title',
-            'project_description', 'description', 'desc',
-            'start_date', 'end_date', 'deadline',
-            'project_status', 'status', 'state',
-            'project_budget', 'budget', 'cost'
-        ]
-        
-        # If we find at least 2 project-related fields, it's likely a project CSV
-        found_patterns = sum(1 for pattern in project_patterns if pattern in csv_columns)
-        return found_patterns >= 2
+    def get_mutation_input(self, row: pd.Series) -> Dict[str, Any]:
+        """Build ProjectInput for a row"""
+        return {
+            "name": row.get("name"),
+            "description": row.get("description"),
+            "startDate": row.get("startDate"),
+            "endDate": row.get("endDate"),
+            "status": row.get("status"),
+            "budget": row.get("budget")
+        }
     
     def get_query(self, id: str) -> Tuple[str, Dict[str, Any]]:
         """Create GraphQL query for project"""
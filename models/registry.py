@@ -1,9 +1,8 @@
-# models/registry.py
 """
 Model registry for managing different data types
 """
 
-from typing import List, Optional, Type, Tuple
+from typing import Dict, Iterable, List, Optional, Type, Tuple, Union
 import pandas as pd
 from .base import BaseModel
 from .customer import CustomerModel
@@ -20,13 +19,67 @@ class ModelRegistry:
             # Add more models here as they're created
             # JobModel(),
         ]
+        self._build_index()
+    
+    def _build_index(self):
+        """Build the column alias -> models index used for detection"""
+        self._alias_index: Dict[str, List[int]] = {}
+        self._min_matches: List[int] = []
+        for position, model in enumerate(self.models):
+            patterns, min_matches = model.get_detection_patterns()
+            self._min_matches.append(min_matches)
+            for pattern in set(patterns):
+                self._alias_index.setdefault(pattern, []).append(position)
+        self._detection_cache: Dict[Tuple[str, ...], Tuple[Optional[BaseModel], float]] = {}
+    
+    @staticmethod
+    def read_header(path: str) -> List[str]:
+        """Read only the header row of a CSV file"""
+        return list(pd.read_csv(path, nrows=0).columns)
+    
+    @staticmethod
+    def _columns(source: Union[pd.DataFrame, Iterable[str]]) -> Iterable[str]:
+        """Get column names from a DataFrame or a header"""
+        return source.columns if isinstance(source, pd.DataFrame) else source
+    
+    def score_columns(self, columns: Iterable[str]) -> List[Tuple[BaseModel, int]]:
+        """Count alias matches for every model against a CSV header"""
+        matches = [0] * len(self.models)
+        for column in {str(col).lower() for col in columns}:
+            for position in self._alias_index.get(column, ()):
+                matches[position] += 1
+        return list(zip(self.models, matches))
+    
+    def detect(self, source: Union[pd.DataFrame, Iterable[str]]) -> Tuple[Optional[BaseModel], float]:
+        """Detect the best matching model for a CSV header
+        
+        Returns the model with the most alias matches among those meeting
+        their minimum, and its share of all matches as a confidence score.
+        Results are cached by header signature.
+        """
+        signature = tuple(sorted({str(col).lower() for col in self._columns(source)}))
+        if signature in self._detection_cache:
+            return self._detection_cache[signature]
+        
+        scores = self.score_columns(signature)
+        total = sum(count for _, count in scores)
+        best, best_count = None, 0
+        for position, (model, count) in enumerate(scores):
+            # Earlier models win ties, like the original first-match order
+            if count >= self._min_matches[position] and (best is None or count > best_count):
+                best, best_count = model, count
+        
+        if best is None:
+            result = (None, 0.0)
+        else:
+            result = (best, best_count / total if total else 1.0)
+        self._detection_cache[signature] = result
+        return result
     
     def detect_model(self, df: pd.DataFrame) -> Optional[BaseModel]:
         """Auto-detect the appropriate model for a CSV"""
-        for model in self.models:
-            if model.detect_from_csv(df):
-                return model
-        return None
+        model, _ = self.detect(df)
+        return model
     
     def get_model_by_name(self, name: str) -> Optional[BaseModel]:
         """Get a model by name"""
@@ -39,18 +92,20 @@ class ModelRegistry:
         """List all available model names"""
         return [model.name for model in self.models]
     
-    def validate_csv(self, df: pd.DataFrame, model_name: Optional[str] = None) -> Tuple[bool, Optional[BaseModel], str]:
-        """Validate that a CSV can be processed by a model"""
+    def validate_csv(self, df: Union[pd.DataFrame, Iterable[str]],
+                     model_name: Optional[str] = None) -> Tuple[bool, Optional[BaseModel], str]:
+        """Validate that a CSV (or just its header) can be processed by a model"""
+        columns = self._columns(df)
         if model_name:
             model = self.get_model_by_name(model_name)
             if not model:
                 return False, None, f"Model '{model_name}' not found"
-            if not model.detect_from_csv(df):
+            if not model.detect_from_columns(columns):
                 return False, None, f"CSV structure doesn't match model '{model_name}'"
             return True, model, f"CSV matches model '{model_name}'"
         else:
-            model = self.detect_model(df)
+            model, confidence = self.detect(columns)
             if model:
-                return True, model, f"Auto-detected model: {model.name}"
+                return True, model, f"Auto-detected model: {model.name} (confidence {confidence:.0%})"
             else:
-                return False, None, "No matching model found for CSV structure" 
\ No newline at end of file
+                return False, None, "No matching model found for CSV structure"
\ No newline at end of file
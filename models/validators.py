@@ -0,0 +1,90 @@
+"""
+Schema-driven field validators for Foreman models
+"""
+
+import re
+from typing import Any, Dict, List
+import pandas as pd
+
+
+def value_text(value: Any) -> str:
+    """Stripped text of a single value"""
+    return str(value).strip()
+
+
+def column_text(values: pd.Series) -> pd.Series:
+    """Stripped text of each value (missing values become 'nan'/'None')"""
+    text = values.to_numpy(dtype=object).astype(str)
+    return pd.Series(text, index=values.index, dtype=object).str.strip()
+
+
+def is_present(value: Any) -> bool:
+    """Check that a single value is neither missing nor blank"""
+    return not pd.isna(value) and value_text(value) != ''
+
+
+def column_present(values: pd.Series) -> pd.Series:
+    """Column-wise is_present"""
+    return values.notna() & (column_text(values) != '')
+
+
+def parse_date(value: Any) -> pd.Timestamp:
+    """Parse a single YYYY-MM-DD date (an optional time part is ignored), NaT if invalid"""
+    return pd.to_datetime(value_text(value)[:10], format='%Y-%m-%d', errors='coerce')
+
+
+def parse_dates(text: pd.Series) -> pd.Series:
+    """Parse YYYY-MM-DD dates (an optional time part is ignored), NaT if invalid"""
+    return pd.to_datetime(text.str.slice(0, 10), format='%Y-%m-%d', errors='coerce')
+
+
+class FieldValidator:
+    """Validator for one schema field, compiled from its declared type
+    
+    Each validator has a precompiled pattern that checks the stripped text of
+    present values; missing values are left to the required-field check.
+    """
+    
+    PATTERNS = {
+        'email': re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+"),
+        'phone': re.compile(r"\+?(?:[\s().-]*\d){10,15}[\s().-]*"),
+        'number': re.compile(r"-?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?|-?\.\d+"),
+        'date': re.compile(r"\d{4}-\d{2}-\d{2}(?:[T ].*)?"),
+    }
+    
+    MESSAGES = {
+        'phone': "Invalid {field} number format",
+    }
+    
+    def __init__(self, field: str, field_type: str):
+        self.field = field
+        self.type = field_type
+        self.pattern = self.PATTERNS[field_type]
+        self.message = self.MESSAGES.get(field_type, "Invalid {field} format").format(field=field)
+    
+    def is_valid(self, value: Any) -> bool:
+        """Check a single present value"""
+        text = value_text(value)
+        if not self.pattern.fullmatch(text):
+            return False
+        if self.type == 'date':
+            return not pd.isna(parse_date(text))
+        return True
+    
+    def invalid_mask(self, values: pd.Series) -> pd.Series:
+        """Mask of present values that fail validation"""
+        present = column_present(values)
+        if not present.any():
+            return pd.Series(False, index=values.index)
+        
+        text = column_text(values)
+        valid = text.str.fullmatch(self.pattern).astype(bool)
+        if self.type == 'date':
+            valid &= parse_dates(text).notna()
+        return present & ~valid
+
+
+def compile_schema(schema: Dict[str, Dict[str, Any]]) -> List[FieldValidator]:
+    """Compile a model schema into validators for every checkable field type"""
+    return [FieldValidator(field, config['type']) for field, config in schema.items()
+            if config.get('type') in FieldValidator.PATTERNS]
@@ -39,6 +39,19 @@ aws cloudformation wait stack-create-complete \
     --stack-name "$STACK_NAME" \
     --region "$REGION"
 
+# The template only holds bootstrap code; ship the real handler from index.py
+echo "📦 Packaging index.py into lambda-function.zip"
+rm -f lambda-function.zip
+zip -j lambda-function.zip index.py
+echo "🚀 Updating Lambda code: foreman-dev-web-api"
+aws lambda update-function-code \
+    --function-name foreman-dev-web-api \
+    --region "$REGION" \
+    --zip-file fileb://lambda-function.zip
+aws lambda wait function-updated \
+    --function-name foreman-dev-web-api \
+    --region "$REGION"
+
 # Get stack outputs
 echo "📋 Getting stack outputs..."
 WEB_API_URL=$(aws cloudformation describe-stacks \
@@ -47,6 +60,16 @@ WEB_API_URL=$(aws cloudformation describe-stacks \
     --query 'Stacks[0].Outputs[?OutputKey==`WebApiUrl`].OutputValue' \
     --output text)
 
+# Browsers PUT upload parts straight to S3 and must be able to read each part's ETag.
+# Only the web interface's own origin may do so.
+WEB_API_ORIGIN=$(echo "$WEB_API_URL" | sed -E 's#^(https?://[^/]+).*#\1#')
+echo "🪣 Applying CORS rules for direct uploads from $WEB_API_ORIGIN to foreman-dev-csv-uploads"
+sed "s#WEB_API_ORIGIN#$WEB_API_ORIGIN#" s3-upload-cors.json > /tmp/foreman-s3-upload-cors.json
+aws s3api put-bucket-cors \
+    --bucket foreman-dev-csv-uploads \
+    --region "$REGION" \
+    --cors-configuration file:///tmp/foreman-s3-upload-cors.json
+
 echo "✅ Simple Web Interface deployment completed successfully!"
 echo ""
 echo "🌐 Web Interface URL:"
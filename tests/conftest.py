@@ -0,0 +1,244 @@
+"""
+Shared fixtures: an in-memory DynamoDB table, an importable Glue job and a
+GraphQL client with a scripted HTTP session
+"""
+
+import copy
+import importlib
+import json as json_module
+import os
+import re
+import sys
+import threading
+import types
+
+import pytest
+import requests
+from boto3.dynamodb.types import TypeDeserializer
+
+# The modules under test live in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+MISSING = object()
+
+
+class ConditionalCheckFailedException(Exception):
+    pass
+
+
+class ConditionEvaluator:
+    """Evaluates the subset of DynamoDB condition expressions the code uses
+    
+    Supports OR/AND/NOT, parentheses, attribute_exists/attribute_not_exists,
+    comparisons (=, <>, <, <=, >, >=), IN lists and dotted map paths. As in
+    DynamoDB, an ordering comparison against a missing attribute is false.
+    """
+    
+    TOKEN = re.compile(r"\s*(<>|<=|>=|=|<|>|\(|\)|,|[#:\w.]+)")
+    
+    def __init__(self, expression, item, names=None, values=None):
+        self.tokens = [match.group(1) for match in self.TOKEN.finditer(expression)]
+        self.item = item
+        self.names = names or {}
+        self.values = values or {}
+        self.position = 0
+    
+    def evaluate(self):
+        result = self._or()
+        assert self.position == len(self.tokens), f"Unparsed condition tokens: {self.tokens[self.position:]}"
+        return result
+    
+    def _peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+    
+    def _take(self, expected=None):
+        token = self.tokens[self.position]
+        assert expected is None or token.upper() == expected, f"Expected {expected}, got {token}"
+        self.position += 1
+        return token
+    
+    def _or(self):
+        result = self._and()
+        while (self._peek() or '').upper() == 'OR':
+            self._take()
+            right = self._and()
+            result = result or right
+        return result
+    
+    def _and(self):
+        result = self._unary()
+        while (self._peek() or '').upper() == 'AND':
+            self._take()
+            right = self._unary()
+            result = result and right
+        return result
+    
+    def _unary(self):
+        token = self._peek()
+        if token.upper() == 'NOT':
+            self._take()
+            return not self._unary()
+        if token == '(':
+            self._take()
+            result = self._or()
+            self._take(')')
+            return result
+        if token in ('attribute_exists', 'attribute_not_exists'):
+            self._take()
+            self._take('(')
+            value = self._resolve(self._take())
+            self._take(')')
+            return (value is not MISSING) == (token == 'attribute_exists')
+        return self._comparison()
+    
+    def _comparison(self):
+        left = self._resolve(self._take())
+        operator = self._take()
+        if operator.upper() == 'IN':
+            self._take('(')
+            options = [self._resolve(self._take())]
+            while self._peek() == ',':
+                self._take()
+                options.append(self._resolve(self._take()))
+            self._take(')')
+            return left is not MISSING and left in options
+        right = self._resolve(self._take())
+        if operator == '<>':
+            return left != right
+        if left is MISSING or right is MISSING:
+            return False
+        return {'=': left == right, '<': left < right, '<=': left <= right,
+                '>': left > right, '>=': left >= right}[operator]
+    
+    def _resolve(self, token):
+        if token.startswith(':'):
+            return self.values[token]
+        value = self.item
+        for part in token.split('.'):
+            part = self.names.get(part, part)
+            if not isinstance(value, dict) or part not in value:
+                return MISSING
+            value = value[part]
+        return value
+
+
+class FakeTable:
+    """In-memory stand-in for a boto3 DynamoDB Table resource"""
+    
+    def __init__(self):
+        self.items = {}
+        self.meta = types.SimpleNamespace(client=types.SimpleNamespace(
+            exceptions=types.SimpleNamespace(ConditionalCheckFailedException=ConditionalCheckFailedException)))
+    
+    def _check(self, key, condition, names, values):
+        if condition and not ConditionEvaluator(condition, self.items.get(key, {}), names, values).evaluate():
+            raise ConditionalCheckFailedException(condition)
+    
+    def put_item(self, Item, ConditionExpression=None, ExpressionAttributeNames=None,
+                 ExpressionAttributeValues=None):
+        self._check(Item['id'], ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues)
+        self.items[Item['id']] = copy.deepcopy(Item)
+    
+    def update_item(self, Key, UpdateExpression, ConditionExpression=None, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None):
+        names = ExpressionAttributeNames or {}
+        values = ExpressionAttributeValues or {}
+        self._check(Key['id'], ConditionExpression, names, values)
+        item = self.items.setdefault(Key['id'], dict(Key))
+        assert UpdateExpression.startswith('SET ')
+        for assignment in UpdateExpression[4:].split(','):
+            name, value = (part.strip() for part in assignment.split('='))
+            item[names.get(name, name)] = copy.deepcopy(values[value])
+    
+    def get_item(self, Key, ConsistentRead=False):
+        item = self.items.get(Key['id'])
+        return {'Item': copy.deepcopy(item)} if item is not None else {}
+
+
+class FakeClient:
+    """Low-level DynamoDB client over a FakeTable, with typed attribute values"""
+    
+    def __init__(self, table):
+        self.table = table
+        self.exceptions = table.meta.client.exceptions
+        self.deserializer = TypeDeserializer()
+    
+    def update_item(self, TableName, Key, ExpressionAttributeValues=None, **kwargs):
+        self.table.update_item(
+            Key={k: self.deserializer.deserialize(v) for k, v in Key.items()},
+            ExpressionAttributeValues={k: self.deserializer.deserialize(v)
+                                       for k, v in (ExpressionAttributeValues or {}).items()},
+            **kwargs
+        )
+
+
+@pytest.fixture
+def registry():
+    return FakeTable()
+
+
+@pytest.fixture
+def registry_client(registry):
+    return FakeClient(registry)
+
+
+@pytest.fixture
+def glue_job(monkeypatch):
+    """Import glue_job.py with the Glue and Spark runtime replaced by stand-ins"""
+    def get_resolved_options(argv, names):
+        options = dict(zip(argv[1::2], argv[2::2]))
+        return {name: options[f"--{name}"] for name in names}
+    
+    job = types.SimpleNamespace(init=lambda *args: None, commit=lambda: None)
+    modules = {
+        'awsglue': types.ModuleType('awsglue'),
+        'awsglue.utils': types.SimpleNamespace(getResolvedOptions=get_resolved_options),
+        'awsglue.context': types.SimpleNamespace(
+            GlueContext=lambda sc: types.SimpleNamespace(spark_session=None)),
+        'awsglue.job': types.SimpleNamespace(Job=lambda context: job),
+        'pyspark': types.ModuleType('pyspark'),
+        'pyspark.context': types.SimpleNamespace(SparkContext=lambda: None),
+        'pyspark.sql': types.SimpleNamespace(SparkSession=None),
+    }
+    for name, module in modules.items():
+        monkeypatch.setitem(sys.modules, name, module)
+    monkeypatch.setattr(sys, 'argv', ['glue_job.py', '--JOB_NAME', 'test-job', '--JOB_RUN_ID', 'jr_test'])
+    monkeypatch.delitem(sys.modules, 'glue_job', raising=False)
+    
+    module = importlib.import_module('glue_job')
+    yield module
+    sys.modules.pop('glue_job', None)
+
+
+class FakeSession:
+    """Stands in for requests.Session: each POST is answered by handler(payload)
+    
+    The handler returns (status, body) or raises a requests exception.
+    """
+    
+    def __init__(self, handler):
+        self.handler = handler
+        self.payloads = []
+        self.lock = threading.Lock()
+    
+    def post(self, url, json=None, headers=None, timeout=None):
+        with self.lock:
+            self.payloads.append(json)
+        status, body = self.handler(json)
+        response = requests.Response()
+        response.status_code = status
+        response._content = body if isinstance(body, bytes) else json_module.dumps(body).encode()
+        return response
+
+
+@pytest.fixture
+def gql_client(monkeypatch):
+    """GraphQLClient whose requests go to client.session.handler, without backoff sleeps"""
+    from gql_client import GraphQLClient
+    
+    monkeypatch.setenv('GRAPHQL_URL', 'https://example.appsync-api.us-east-1.amazonaws.com/graphql')
+    monkeypatch.setenv('APPSYNC_API_KEY', 'test-key')
+    client = GraphQLClient(max_connections=4, max_retries=3)
+    client.throttle.base_delay = 0.0
+    client.session = FakeSession(lambda payload: (500, b'no handler'))
+    return client
\ No newline at end of file
@@ -0,0 +1,113 @@
+"""
+Resume journal: stable row keys and journal files that survive a crash
+"""
+
+import numpy as np
+import pandas as pd
+
+from checkpoint import CheckpointJournal, file_hash, row_keys
+from models.customer import CustomerModel
+
+ROWS = {
+    'name': ['Ada', 'Grace', 'Alan'],
+    'email': ['ada@example.com', 'grace@example.com', None],
+    'phone': ['5551234567', None, '5557654321'],
+}
+
+
+def test_row_keys_ignore_dtype_and_missing_value_spelling():
+    model = CustomerModel()
+    text = pd.DataFrame({**ROWS, 'signupDate': ['2024-01-01', '', '2024-03-01']})
+    numeric = pd.DataFrame({**ROWS, 'email': ['ada@example.com', 'grace@example.com', np.nan],
+                            'signupDate': ['2024-01-01', '', '2024-03-01']})
+    numeric['phone'] = [5551234567.0, np.nan, 5557654321.0]
+    
+    assert row_keys(model, text).tolist() == row_keys(model, numeric).tolist()
+
+
+def test_row_keys_include_the_absolute_row_number():
+    model = CustomerModel()
+    first = pd.DataFrame({'name': ['Ada', 'Ada'], 'email': ['a@b.co', 'a@b.co']})
+    later_chunk = first.set_axis([1000, 1001])
+    
+    keys = row_keys(model, first)
+    
+    assert keys[0] != keys[1]
+    assert not set(keys) & set(row_keys(model, later_chunk))
+
+
+def test_row_keys_ignore_columns_outside_the_schema():
+    model = CustomerModel()
+    df = pd.DataFrame(ROWS)
+    
+    assert row_keys(model, df).tolist() == row_keys(model, df.assign(extra=[1, 2, 3])).tolist()
+
+
+def test_journal_is_reloaded_when_resuming(tmp_path):
+    journal = CheckpointJournal(str(tmp_path), 'abc')
+    journal.record('k1', 'id-1')
+    journal.record('k2', None)
+    journal.close()
+    
+    resumed = CheckpointJournal(str(tmp_path), 'abc', resume=True)
+    resumed.close()
+    
+    assert resumed.is_confirmed('k1') and resumed.is_confirmed('k2')
+    assert resumed.get_record_id('k1') == 'id-1'
+    assert not resumed.is_confirmed('k3')
+
+
+def test_journal_starts_fresh_without_resume(tmp_path):
+    journal = CheckpointJournal(str(tmp_path), 'abc')
+    journal.record('k1', 'id-1')
+    journal.close()
+    
+    fresh = CheckpointJournal(str(tmp_path), 'abc', resume=False)
+    fresh.record('k2', 'id-2')
+    fresh.close()
+    
+    assert fresh.confirmed == {'k2': 'id-2'}
+    assert (tmp_path / 'abc.journal').read_text() == 'k2 id-2\n'
+    assert (tmp_path / 'abc.journal.prev').read_text() == 'k1 id-1\n'
+
+
+def test_file_hash_reads_in_blocks(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_bytes(b'name,email\n' * 1000)
+    
+    assert file_hash(str(path), block_size=7) == file_hash(str(path))
+
+
+class FakeClient:
+    """Creates every row except those whose name is in fail_names"""
+    
+    def __init__(self, fail_names=()):
+        self.fail_names = set(fail_names)
+        self.submitted = []
+    
+    def submit_records(self, model, rows, concurrency=1, batch_size=1):
+        for row in rows:
+            self.submitted.append(row['name'])
+            if row['name'] in self.fail_names:
+                yield False, 'HTTP 500'
+            else:
+                yield True, {'id': f"id-{row['name']}"}
+
+
+def test_resumed_submit_skips_confirmed_rows(tmp_path):
+    from main import submit_chunk
+    
+    model = CustomerModel()
+    df = model.map_fields(pd.DataFrame({'name': ['Ada', 'Grace', 'Alan'],
+                                        'email': ['ada@example.com', 'grace@example.com', 'alan@example.com']}))
+    
+    journal = CheckpointJournal(str(tmp_path), 'abc')
+    assert submit_chunk(FakeClient(fail_names={'Grace'}), model, df, journal=journal) == (2, 1, 0)
+    journal.close()
+    
+    client = FakeClient()
+    journal = CheckpointJournal(str(tmp_path), 'abc', resume=True)
+    assert submit_chunk(client, model, df, journal=journal) == (1, 0, 2)
+    journal.close()
+    
+    assert client.submitted == ['Grace']
\ No newline at end of file
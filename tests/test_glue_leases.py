@@ -0,0 +1,114 @@
+"""
+Glue job object#<key> leases, their heartbeat and progress snapshots
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+
+def run_as(monkeypatch, glue_job, run_id):
+    monkeypatch.setattr(glue_job, 'job_run_id', run_id)
+
+
+def expire(registry, item_id):
+    registry.items[item_id]['lease_expires_at'] = (datetime.now() - timedelta(seconds=1)).isoformat()
+
+
+def test_active_lease_blocks_other_runs(glue_job, registry, monkeypatch):
+    assert glue_job.lease_object(registry, 'a.csv', 'etag-1')
+    
+    run_as(monkeypatch, glue_job, 'jr_other')
+    assert not glue_job.lease_object(registry, 'a.csv', 'etag-1')
+    
+    expire(registry, 'object#a.csv')
+    assert glue_job.lease_object(registry, 'a.csv', 'etag-1')
+    assert registry.items['object#a.csv']['job_run_id'] == 'jr_other'
+
+
+@pytest.mark.parametrize('status, etag, leased', [
+    ('failed', 'etag-1', True),
+    ('queued', 'etag-1', True),
+    ('completed', 'etag-1', False),
+    ('completed', 'etag-2', True),
+])
+def test_finished_objects(glue_job, registry, monkeypatch, status, etag, leased):
+    glue_job.lease_object(registry, 'a.csv', 'etag-1')
+    glue_job.update_registry_item(registry, 'object#a.csv', status)
+    
+    run_as(monkeypatch, glue_job, 'jr_other')
+    
+    assert glue_job.lease_object(registry, 'a.csv', etag) is leased
+
+
+@pytest.mark.parametrize('status', ['completed', 'skipped'])
+def test_finished_objects_stay_finished_after_the_lease_expires(glue_job, registry, monkeypatch, status):
+    glue_job.lease_object(registry, 'a.csv', 'etag-1')
+    glue_job.update_registry_item(registry, 'object#a.csv', status)
+    expire(registry, 'object#a.csv')
+    
+    run_as(monkeypatch, glue_job, 'jr_other')
+    
+    assert not glue_job.lease_object(registry, 'a.csv', 'etag-1')
+
+
+def test_only_the_leasing_run_can_finish_an_object(glue_job, registry, monkeypatch):
+    glue_job.lease_object(registry, 'a.csv', 'etag-1')
+    
+    run_as(monkeypatch, glue_job, 'jr_other')
+    with pytest.raises(registry.meta.client.exceptions.ConditionalCheckFailedException):
+        glue_job.update_registry_item(registry, 'object#a.csv', 'completed')
+    
+    assert registry.items['object#a.csv']['status'] == 'processing'
+
+
+def test_heartbeat_extends_its_own_lease(glue_job, registry, registry_client):
+    glue_job.lease_object(registry, 'a.csv', 'etag-1')
+    expire(registry, 'object#a.csv')
+    heartbeat = glue_job.LeaseHeartbeat(registry_client)
+    heartbeat.item_ids.append('object#a.csv')
+    
+    heartbeat.renew('object#a.csv')
+    
+    assert registry.items['object#a.csv']['lease_expires_at'] > datetime.now().isoformat()
+    assert heartbeat.item_ids == ['object#a.csv']
+
+
+def test_heartbeat_drops_a_lease_taken_over_by_another_run(glue_job, registry, registry_client, monkeypatch):
+    glue_job.lease_object(registry, 'a.csv', 'etag-1')
+    expire(registry, 'object#a.csv')
+    heartbeat = glue_job.LeaseHeartbeat(registry_client)
+    heartbeat.item_ids.append('object#a.csv')
+    
+    run_as(monkeypatch, glue_job, 'jr_other')
+    glue_job.lease_object(registry, 'a.csv', 'etag-1')
+    taken_over = dict(registry.items['object#a.csv'])
+    
+    run_as(monkeypatch, glue_job, 'jr_test')
+    heartbeat.renew('object#a.csv')
+    
+    assert heartbeat.item_ids == []
+    assert registry.items['object#a.csv'] == taken_over
+
+
+def test_heartbeat_stops_after_the_final_status(glue_job, registry, registry_client):
+    glue_job.lease_object(registry, 'a.csv', 'etag-1')
+    glue_job.update_registry_item(registry, 'object#a.csv', 'completed')
+    heartbeat = glue_job.LeaseHeartbeat(registry_client)
+    heartbeat.item_ids.append('object#a.csv')
+    
+    heartbeat.renew('object#a.csv')
+    
+    assert heartbeat.item_ids == []
+
+def test_progress_snapshots_never_go_backwards(glue_job, registry, registry_client):
+    glue_job.lease_object(registry, 'a.csv', 'etag-1')
+    progress = glue_job.ProgressReporter(registry_client, 'object#a.csv')
+    
+    progress.set_stage('reading')
+    older = progress._snapshot()
+    progress.set_stage('writing', total=10, counter='rows_written')
+    progress._write(older)
+    
+    assert registry.items['object#a.csv']['progress']['stage'] == 'writing'
+    assert registry.items['object#a.csv']['progress']['sequence'] == older['sequence'] + 1
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""
+Glue job file registry: content claims on hash#<md5> items
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+
+def run_as(monkeypatch, glue_job, run_id):
+    monkeypatch.setattr(glue_job, 'job_run_id', run_id)
+
+
+def test_first_claim_wins(glue_job, registry, monkeypatch):
+    assert glue_job.claim_file(registry, 'abc', 'a.csv') == (True, None)
+    
+    run_as(monkeypatch, glue_job, 'jr_other')
+    claimed, existing = glue_job.claim_file(registry, 'abc', 'b.csv')
+    
+    assert not claimed
+    assert existing['job_run_id'] == 'jr_test' and existing['status'] == 'processing'
+
+
+def test_completed_content_is_never_claimed_again(glue_job, registry, monkeypatch):
+    glue_job.claim_file(registry, 'abc', 'a.csv')
+    glue_job.release_file_claim(registry, 'abc', 'completed', successful_records=3)
+    
+    run_as(monkeypatch, glue_job, 'jr_other')
+    claimed, existing = glue_job.claim_file(registry, 'abc', 'b.csv')
+    
+    assert not claimed and existing['status'] == 'completed'
+    assert registry.items['hash#abc']['job_run_id'] == 'jr_test'
+
+
+def test_failed_claim_can_be_taken_over(glue_job, registry, monkeypatch):
+    glue_job.claim_file(registry, 'abc', 'a.csv')
+    glue_job.release_file_claim(registry, 'abc', 'failed', error='boom')
+    
+    run_as(monkeypatch, glue_job, 'jr_other')
+    claimed, existing = glue_job.claim_file(registry, 'abc', 'a.csv')
+    
+    assert claimed and existing['status'] == 'failed'
+    assert registry.items['hash#abc']['job_run_id'] == 'jr_other'
+
+
+def test_expired_claim_can_be_taken_over(glue_job, registry, monkeypatch):
+    glue_job.claim_file(registry, 'abc', 'a.csv')
+    registry.items['hash#abc']['lease_expires_at'] = (datetime.now() - timedelta(seconds=1)).isoformat()
+    
+    run_as(monkeypatch, glue_job, 'jr_other')
+    
+    assert glue_job.claim_file(registry, 'abc', 'a.csv')[0]
+
+
+def test_claims_without_a_lease_expire_from_claimed_at(glue_job, registry):
+    stale = (datetime.now() - glue_job.FILE_CLAIM_TIMEOUT - timedelta(minutes=1)).isoformat()
+    fresh = datetime.now().isoformat()
+    registry.put_item(Item={'id': 'hash#old', 'status': 'processing', 'job_run_id': 'lambda', 'claimed_at': stale})
+    registry.put_item(Item={'id': 'hash#new', 'status': 'processing', 'job_run_id': 'lambda', 'claimed_at': fresh})
+    
+    assert glue_job.claim_file(registry, 'old', 'a.csv')[0]
+    assert not glue_job.claim_file(registry, 'new', 'b.csv')[0]
+
+
+def test_only_the_claiming_run_can_release(glue_job, registry, monkeypatch):
+    glue_job.claim_file(registry, 'abc', 'a.csv')
+    
+    run_as(monkeypatch, glue_job, 'jr_other')
+    with pytest.raises(registry.meta.client.exceptions.ConditionalCheckFailedException):
+        glue_job.release_file_claim(registry, 'abc', 'completed')
+    
+    assert registry.items['hash#abc']['status'] == 'processing'
\ No newline at end of file
@@ -0,0 +1,172 @@
+"""
+Glue pandas mode must accept, reject and write exactly what the per-row loop did
+"""
+
+import hashlib
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+from boto3.dynamodb.types import TypeDeserializer
+
+# (email, file_hash) of customers already stored; this file's hash is 'abc'
+STORED = [('taken@example.com', 'other')]
+
+ROWS = pd.DataFrame({
+    'email': ['ada@example.com', None, 'TAKEN@example.com', 'no-at.com', ' Grace@Navy.mil ', 'ada@example.com',
+              None, 'x@y', 'alan@example.com', 'nobody@example.com'],
+    'Email Address': [None, 'linus@example.com', None, None, None, None, None, None, None, None],
+    'name': ['Ada', 'Linus', 'Tak', None, ' Grace ', 'Ada Again', 'Nameless', 'Xy', np.nan, None],
+    'Full Name': [None, None, None, 'Noat', None, None, None, None, 'Alan Turing', None],
+    'phone': ['555', None, None, None, ' 123 ', None, None, None, 5551234567.0, None],
+    'Signup Date': ['2024-01-01', None, None, None, '2024-02-01', None, None, None, None, None],
+})
+
+
+class FakeDynamoDB:
+    """Answers EmailIndex queries from stored (email, file_hash) pairs and records written items"""
+    
+    def __init__(self, stored):
+        self.stored = stored
+        self.items = []
+        self.queries = 0
+        self.scans = 0
+        self.exceptions = types.SimpleNamespace(
+            ProvisionedThroughputExceededException=type('Throttled', (Exception,), {}))
+    
+    def query(self, **kwargs):
+        self.queries += 1
+        email = kwargs['ExpressionAttributeValues'][':email']['S']
+        return {'Items': [{'email': {'S': email}, 'file_hash': {'S': file_hash}}
+                          for stored, file_hash in self.stored if stored == email]}
+    
+    def scan(self, **kwargs):
+        self.scans += 1
+        items = [{'email': {'S': email}, 'file_hash': {'S': file_hash}} for email, file_hash in self.stored]
+        return {'Items': items if kwargs['Segment'] == 0 else []}
+    
+    def batch_write_item(self, RequestItems):
+        deserializer = TypeDeserializer()
+        for requests in RequestItems.values():
+            for request in requests:
+                item = request['PutRequest']['Item']
+                self.items.append({key: deserializer.deserialize(value) for key, value in item.items()})
+        return {}
+
+
+def per_row_reference(df, existing):
+    """The original row loop, with the table scan replaced by a set of stored emails"""
+    def first(row, variants):
+        return next((row[col] for col in variants if col in row and not pd.isna(row[col])), None)
+    
+    stored = set(existing)
+    written, errors = {}, []
+    for index, row in df.iterrows():
+        email = first(row, ['email', 'email_address', 'Email', 'Email Address'])
+        name = first(row, ['name', 'full_name', 'Name', 'Full Name'])
+        if email is None:
+            errors.append(f"Row {index + 1}: Email column not found (tried: email, email_address, Email, Email Address)")
+            continue
+        if name is None:
+            errors.append(f"Row {index + 1}: Name column not found (tried: name, full_name, Name, Full Name)")
+            continue
+        email = str(email).strip().lower()
+        phone = first(row, ['phone', 'phone_number', 'Phone', 'Phone Number'])
+        signup_date = first(row, ['signupDate', 'hire_date', 'Signup Date', 'Hire Date'])
+        if '@' not in email or '.' not in email:
+            errors.append(f"Row {index + 1}: Invalid email format")
+            continue
+        if email in stored:
+            errors.append(f"Row {index + 1}: Duplicate email {email}")
+            continue
+        stored.add(email)
+        written[email] = {'name': str(name).strip(), 'phone': '' if phone is None else str(phone).strip(),
+                          'signupDate': '' if signup_date is None else str(signup_date).strip()}
+    return written, errors
+
+
+@pytest.fixture
+def run_pandas(glue_job, monkeypatch):
+    monkeypatch.setattr(glue_job, 'export_parquet', lambda records, *args: {'rows': len(records)})
+    progress = types.SimpleNamespace(set_stage=lambda *args, **kwargs: None, update=lambda **counts: None)
+    
+    def run(df, stored, existing_emails=None, file_hash='abc'):
+        dynamodb = FakeDynamoDB(stored)
+        existing_emails = existing_emails or glue_job.ExistingEmails(dynamodb)
+        result = glue_job.process_rows_with_pandas(df, 'upload.csv', file_hash, None, dynamodb, existing_emails,
+                                                   progress)
+        return result, dynamodb.items
+    return run
+
+
+def test_pandas_mode_matches_the_per_row_loop(run_pandas, glue_job):
+    expected_written, expected_errors = per_row_reference(ROWS, {'taken@example.com'})
+    
+    result, items = run_pandas(ROWS, STORED)
+    
+    assert result['errors'] == expected_errors
+    assert {item['email']: {key: item[key] for key in ('name', 'phone', 'signupDate')} for item in items} == expected_written
+    assert all(item['id'] == glue_job.customer_id(item['email']) for item in items)
+    assert (result['records_processed'], result['successful_records'], result['error_records']) == \
+        (len(ROWS), len(expected_written), len(expected_errors))
+    assert result['parquet']['rows'] == len(expected_written)
+
+
+def test_pandas_mode_without_a_name_column(run_pandas):
+    df = pd.DataFrame({'email': ['a@b.co', None]})
+    
+    result, items = run_pandas(df, [])
+    
+    assert result['errors'] == per_row_reference(df, set())[1]
+    assert items == []
+
+
+def test_retry_upserts_rows_this_file_already_stored(run_pandas):
+    # ada was written by an earlier attempt of this file; alan also by another file
+    stored = STORED + [('ada@example.com', 'abc'), ('alan@example.com', 'abc'), ('alan@example.com', 'other')]
+    expected_written, expected_errors = per_row_reference(ROWS, {'taken@example.com', 'alan@example.com'})
+    
+    result, items = run_pandas(ROWS, stored)
+    
+    assert 'ada@example.com' in expected_written and 'alan@example.com' not in expected_written
+    assert result['errors'] == expected_errors
+    assert sorted(item['email'] for item in items) == sorted(expected_written)
+    assert result['parquet']['rows'] == len(expected_written)
+
+
+def test_later_files_of_a_run_see_emails_earlier_files_wrote(run_pandas, glue_job):
+    existing_emails = glue_job.ExistingEmails(FakeDynamoDB(STORED))
+    first, _ = run_pandas(ROWS, STORED, existing_emails)
+    
+    second, items = run_pandas(ROWS.head(1), STORED, existing_emails, file_hash='def')
+    
+    assert first['successful_records'] == 4
+    assert second['errors'] == ['Row 1: Duplicate email ada@example.com'] and items == []
+
+
+def test_existing_emails_are_read_once_per_run(glue_job, monkeypatch):
+    monkeypatch.setattr(glue_job, 'EMAIL_QUERY_LIMIT', 2)
+    dynamodb = FakeDynamoDB([('a@x.io', 'f1'), ('b@x.io', 'f1'), ('b@x.io', 'f2')])
+    existing_emails = glue_job.ExistingEmails(dynamodb)
+    
+    assert existing_emails.lookup({'a@x.io', 'new@x.io'}) == {'a@x.io': 'f1'}
+    assert existing_emails.lookup({'a@x.io', 'new@x.io'}) == {'a@x.io': 'f1'}
+    assert dynamodb.queries == 2
+    
+    existing_emails.add({'new@x.io'}, 'f3')
+    assert existing_emails.lookup({'new@x.io', 'b@x.io', 'c@x.io', 'd@x.io'}) == {'new@x.io': 'f3', 'b@x.io': None}
+    assert existing_emails.lookup({'e@x.io', 'f@x.io', 'g@x.io'}) == {}
+    assert (dynamodb.queries, dynamodb.scans) == (2, glue_job.EMAIL_SCAN_SEGMENTS)
+
+
+def test_hashing_stream_hashes_unread_content(glue_job):
+    content = b'name,email\n' + b'Ada,ada@example.com\n' * 1000
+    chunks = [content[start:start + 4096] for start in range(0, len(content), 4096)]
+    seen = []
+    
+    stream = glue_job.HashingStream(chunks, on_read=seen.append)
+    stream.read(10)
+    
+    assert stream.hexdigest() == hashlib.md5(content).hexdigest()
+    assert seen[-1] == stream.bytes_read == len(content)
\ No newline at end of file
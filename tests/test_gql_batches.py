@@ -0,0 +1,97 @@
+"""
+Batched mutations: results and errors map back to the rows they belong to
+"""
+
+import pandas as pd
+
+from models.customer import CustomerModel
+
+ROWS = [pd.Series({'name': name, 'email': f"{name.lower()}@example.com"})
+        for name in ['Ada', 'Grace', 'Alan', 'Edsger', 'Barbara']]
+THROTTLE_ERROR = {'errorType': 'DynamoDB:ProvisionedThroughputExceededException', 'message': 'Rate exceeded'}
+
+
+def created(payload, failed=()):
+    """Echo each aliased input back as created, except the aliases in failed"""
+    return {f"r{name[5:]}": None if f"r{name[5:]}" in failed else {'id': value['email'], **value}
+            for name, value in payload['variables'].items()}
+
+
+def test_alias_errors_fail_only_their_rows(gql_client):
+    errors = [{'path': ['r1', 'email'], 'message': 'duplicate email'}, {'path': ['r3'], 'message': 'bad name'}]
+    gql_client.session.handler = lambda payload: (200, {'data': created(payload, failed={'r1', 'r3'}),
+                                                        'errors': errors})
+    
+    results = gql_client.submit_batch(CustomerModel(), ROWS)
+    
+    assert [success for success, _ in results] == [True, False, True, False, True]
+    assert results[1][1] == [errors[0]] and results[3][1] == [errors[1]]
+    assert [result['name'] for success, result in results if success] == ['Ada', 'Alan', 'Barbara']
+
+
+def test_general_errors_fall_through_to_rows_without_data(gql_client):
+    general = {'message': 'Request aborted'}
+    gql_client.session.handler = lambda payload: (200, {'data': created(payload, failed={'r2', 'r4'}),
+                                                        'errors': [general]})
+    
+    results = gql_client.submit_batch(CustomerModel(), ROWS)
+    
+    assert [success for success, _ in results] == [True, True, False, True, False]
+    assert results[2] == (False, [general]) and results[4] == (False, [general])
+
+
+def test_rows_without_data_or_errors_fail(gql_client):
+    gql_client.session.handler = lambda payload: (200, {'data': created(payload, failed={'r0'})})
+    
+    results = gql_client.submit_batch(CustomerModel(), ROWS[:2])
+    
+    assert results[0] == (False, "No data returned from mutation") and results[1][0]
+
+
+def test_http_errors_fail_every_row(gql_client):
+    gql_client.session.handler = lambda payload: (500, b'Internal Server Error')
+    
+    results = gql_client.submit_batch(CustomerModel(), ROWS[:3])
+    
+    assert results == [(False, "HTTP 500: Internal Server Error")] * 3
+    assert len(gql_client.session.payloads) == 1
+
+
+def test_only_throttled_rows_are_resubmitted_and_put_back_in_order(gql_client):
+    def handler(payload):
+        if len(gql_client.session.payloads) == 1:
+            errors = [{'path': ['r1'], **THROTTLE_ERROR}, {'path': ['r2'], 'message': 'bad email'},
+                      {'path': ['r4'], **THROTTLE_ERROR}]
+            return 200, {'data': created(payload, failed={'r1', 'r2', 'r4'}), 'errors': errors}
+        return 200, {'data': created(payload)}
+    gql_client.session.handler = handler
+    
+    results = gql_client.submit_batch(CustomerModel(), ROWS)
+    
+    retried = gql_client.session.payloads[1]['variables']
+    assert [value['name'] for value in retried.values()] == ['Grace', 'Barbara']
+    assert [success for success, _ in results] == [True, True, False, True, True]
+    assert [result['name'] for success, result in results if success] == ['Ada', 'Grace', 'Edsger', 'Barbara']
+    assert results[2][1] == [{'path': ['r2'], 'message': 'bad email'}]
+    assert gql_client.throttle.throttled == 1
+
+
+def test_fully_throttled_batches_fail_after_max_retries(gql_client):
+    errors = [{'path': ['r0'], **THROTTLE_ERROR}, {'path': ['r1'], **THROTTLE_ERROR}]
+    gql_client.session.handler = lambda payload: (200, {'data': created(payload, failed={'r0', 'r1'}),
+                                                        'errors': errors})
+    
+    results = gql_client.submit_batch(CustomerModel(), ROWS[:2])
+    
+    assert results == [(False, [errors[0]]), (False, [errors[1]])]
+    assert len(gql_client.session.payloads) == gql_client.throttle.max_retries + 1
+
+def test_resubmitted_rows_share_one_retry_budget(gql_client):
+    gql_client.session.handler = lambda payload: (200, {
+        'data': created(payload, failed={'r0'}), 'errors': [{'path': ['r0'], **THROTTLE_ERROR}]})
+    
+    results = gql_client.submit_batch(CustomerModel(), [ROWS[0], ROWS[1]])
+    
+    # The first request creates Grace; Ada is retried alone until the budget runs out
+    assert not results[0][0] and results[1][0]
+    assert len(gql_client.session.payloads) == gql_client.throttle.max_retries + 1
\ No newline at end of file
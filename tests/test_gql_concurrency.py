@@ -0,0 +1,46 @@
+"""
+Concurrent submission yields results in input order
+"""
+
+import time
+
+import pandas as pd
+import pytest
+
+from models.customer import CustomerModel
+
+ROWS = [pd.Series({'name': f"Customer {i}", 'email': f"customer{i}@example.com"}) for i in range(20)]
+
+
+def slower_for_earlier_rows(payload):
+    """Echo inputs back, answering earlier rows later so requests finish out of order"""
+    inputs = payload['variables']
+    first = min(int(value['name'].split()[1]) for value in inputs.values())
+    time.sleep((len(ROWS) - first) * 0.002)
+    if 'input' in inputs:
+        return 200, {'data': {'createCustomer': {'id': inputs['input']['email'], **inputs['input']}}}
+    return 200, {'data': {f"r{name[5:]}": {'id': value['email'], **value} for name, value in inputs.items()}}
+
+
+@pytest.mark.parametrize('batch_size', [1, 3])
+def test_results_follow_input_order(gql_client, batch_size):
+    gql_client.session.handler = slower_for_earlier_rows
+    
+    results = list(gql_client.submit_records(CustomerModel(), iter(ROWS), concurrency=4, batch_size=batch_size))
+    
+    assert [result['email'] for _, result in results] == [row['email'] for row in ROWS]
+    assert all(success for success, _ in results)
+    assert len(gql_client.session.payloads) == -(-len(ROWS) // batch_size)
+
+
+def test_failed_rows_keep_their_place(gql_client):
+    def handler(payload):
+        if payload['variables']['input']['name'].endswith('7'):
+            return 400, b'Bad Request'
+        return slower_for_earlier_rows(payload)
+    gql_client.session.handler = handler
+    
+    results = list(gql_client.submit_records(CustomerModel(), ROWS, concurrency=4))
+    
+    assert [success for success, _ in results] == [not row['name'].endswith('7') for row in ROWS]
+    assert results[7] == (False, 'HTTP 400: Bad Request')
\ No newline at end of file
@@ -0,0 +1,108 @@
+"""
+Only requests that cannot have created anything are retried
+"""
+
+import pandas as pd
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+from gql_client import ThrottleController
+from models.customer import CustomerModel
+
+ROW = pd.Series({'name': 'Ada', 'email': 'ada@example.com'})
+CREATED = {'data': {'createCustomer': {'id': 'c1', 'name': 'Ada'}}}
+THROTTLED = {'data': {'createCustomer': None},
+             'errors': [{'errorType': 'DynamoDB:ProvisionedThroughputExceededException', 'message': 'Rate exceeded'}]}
+
+
+def scripted(*outcomes):
+    """Handler answering successive POSTs with outcomes; exceptions are raised"""
+    outcomes = list(outcomes)
+    
+    def handler(payload):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    return handler
+
+
+def connection_error(reason):
+    return requests.ConnectionError(MaxRetryError(None, '/graphql', reason=reason))
+
+
+@pytest.mark.parametrize('first', [
+    (429, b'Too Many Requests'),
+    (200, THROTTLED),
+    requests.ConnectTimeout('connect timed out'),
+    connection_error(NewConnectionError(None, 'Failed to establish a new connection')),
+], ids=['http-429', 'graphql-throttled', 'connect-timeout', 'new-connection'])
+def test_throttled_and_unsent_requests_are_retried(gql_client, first):
+    gql_client.session.handler = scripted(first, (200, CREATED))
+    
+    assert gql_client.submit_record(CustomerModel(), ROW) == (True, CREATED['data']['createCustomer'])
+    assert len(gql_client.session.payloads) == 2
+    assert gql_client.throttle.retries == 1
+
+
+@pytest.mark.parametrize('outcome', [
+    (500, b'Internal Server Error'),
+    (502, b'Bad Gateway'),
+    requests.ReadTimeout('read timed out'),
+    connection_error(ProtocolError('Connection aborted.')),
+    (200, {'data': {'createCustomer': None},
+           'errors': THROTTLED['errors'] + [{'errorType': 'ValidationError', 'message': 'bad email'}]}),
+], ids=['http-500', 'http-502', 'read-timeout', 'aborted-after-send', 'mixed-errors'])
+def test_requests_that_may_have_been_applied_are_not_retried(gql_client, outcome):
+    gql_client.session.handler = scripted(outcome, (200, CREATED))
+    
+    success, _ = gql_client.submit_record(CustomerModel(), ROW)
+    
+    assert not success
+    assert len(gql_client.session.payloads) == 1
+    assert gql_client.throttle.retries == 0
+
+
+def test_error_kinds_are_counted_separately(gql_client):
+    gql_client.session.handler = scripted((500, b''), requests.ReadTimeout('read timed out'), (429, b''),
+                                          (200, CREATED))
+    for _ in range(3):
+        gql_client.submit_record(CustomerModel(), ROW)
+    
+    summary = gql_client.throttle.summary()
+    
+    assert (summary['server_errors'], summary['connection_errors'], summary['throttled']) == (1, 1, 1)
+    assert summary['requests'] == 4
+
+
+def test_retries_stop_after_max_retries(gql_client):
+    gql_client.session.handler = lambda payload: (429, b'Too Many Requests')
+    
+    success, error = gql_client.submit_record(CustomerModel(), ROW)
+    
+    assert not success and error.startswith('HTTP 429')
+    assert len(gql_client.session.payloads) == gql_client.throttle.max_retries + 1
+
+
+def test_limit_halves_on_throttling_and_recovers_one_slot_per_window():
+    throttle = ThrottleController(max_concurrency=8)
+    
+    throttle.record_throttle()
+    assert throttle.limit == 4
+    # Throttles within the same second only count once
+    throttle.record_throttle()
+    assert throttle.limit == 4
+    throttle._last_decrease -= 1.0
+    throttle.record_throttle()
+    assert throttle.limit == 2
+    
+    limits = []
+    for _ in range(40):
+        throttle.record_success()
+        limits.append(throttle.limit)
+    
+    # A window of `limit` successes adds one slot, up to max_concurrency
+    assert limits[:6] == [2, 3, 3, 3, 4, 4]
+    assert limits[-1] == 8 and max(limits) == 8
+    assert throttle.throttled == 3
\ No newline at end of file
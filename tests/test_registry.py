@@ -0,0 +1,73 @@
+"""
+Alias-index model detection must agree with each model's own header check
+"""
+
+import os
+
+import pytest
+
+from models.registry import ModelRegistry
+
+HEADERS = [
+    ['full_name', 'email_address', 'phone_number', 'company_name'],
+    ['Name', 'EMAIL', 'signupDate'],
+    ['project_name', 'description', 'start_date', 'end_date', 'budget'],
+    ['title', 'status'],
+    ['name', 'email', 'description', 'status', 'budget'],
+    ['name', 'description'],
+    ['name', 'email', 'title', 'status'],
+    ['name'],
+    ['sku', 'price'],
+    [],
+]
+
+
+@pytest.fixture
+def registry():
+    return ModelRegistry()
+
+
+@pytest.mark.parametrize('header', HEADERS)
+def test_score_columns_matches_per_model_pattern_counts(registry, header):
+    columns = {column.lower() for column in header}
+    expected = [sum(1 for pattern in model.get_detection_patterns()[0] if pattern in columns)
+                for model in registry.models]
+    
+    assert [count for _, count in registry.score_columns(header)] == expected
+
+
+@pytest.mark.parametrize('header', HEADERS)
+def test_detect_picks_the_best_matching_model(registry, header):
+    matching = [model for model in registry.models if model.detect_from_columns(header)]
+    scores = dict((model.name, count) for model, count in registry.score_columns(header))
+    
+    model, confidence = registry.detect(header)
+    
+    if not matching:
+        assert (model, confidence) == (None, 0.0)
+    else:
+        best = max(scores[candidate.name] for candidate in matching)
+        # Earlier models win ties
+        assert model is next(candidate for candidate in matching if scores[candidate.name] == best)
+        assert 0 < confidence <= 1
+
+
+def test_detect_is_case_insensitive_and_cached_by_header_set(registry):
+    first = registry.detect(['Full_Name', 'Email_Address'])
+    
+    assert first[0].name == 'customer'
+    assert registry.detect(['email_address', 'full_name']) is first
+
+
+def test_detect_sample_file(registry):
+    header = ModelRegistry.read_header(os.path.join(os.path.dirname(__file__), '..', 'samples', 'customers.csv'))
+    
+    is_valid, model, message = registry.validate_csv(header)
+    
+    assert is_valid and model.name == 'customer', message
+
+
+def test_validate_csv_with_a_named_model(registry):
+    assert registry.validate_csv(['project_name', 'budget'], 'project')[:2] == (True, registry.get_model_by_name('project'))
+    assert registry.validate_csv(['project_name', 'budget'], 'customer')[0] is False
+    assert registry.validate_csv(['name'], 'job') == (False, None, "Model 'job' not found")
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""
+S3 pipeline Lambda (inline in its CloudFormation template): content claims
+"""
+
+import json
+import os
+import textwrap
+import types
+from datetime import datetime, timedelta
+
+import boto3
+import pytest
+
+TEMPLATE = os.path.join(os.path.dirname(__file__), '..', 'cloudformation', 'foreman-s3-pipeline-simple.yaml')
+
+
+def inline_code(template, resource):
+    """The ZipFile source of one Lambda resource in a template"""
+    lines = open(template).read().split('\n')
+    start = lines.index(f"  {resource}:")
+    start = next(i for i in range(start, len(lines)) if lines[i].strip() == 'ZipFile: |') + 1
+    body = []
+    for line in lines[start:]:
+        if line.strip() and not line.startswith(' ' * 10):
+            break
+        body.append(line)
+    return textwrap.dedent('\n'.join(body))
+
+
+@pytest.fixture
+def pipeline(monkeypatch, registry):
+    s3 = types.SimpleNamespace(objects={}, calls=[])
+    s3.download_file = lambda bucket, key, path: open(path, 'wb').write(s3.objects[key])
+    s3.copy_object = lambda **kwargs: s3.calls.append(('copy', kwargs['Key']))
+    s3.delete_object = lambda **kwargs: s3.calls.append(('delete', kwargs['Key']))
+    monkeypatch.setattr(boto3, 'client', lambda *args, **kwargs: s3)
+    monkeypatch.setattr(boto3, 'resource', lambda *args, **kwargs: types.SimpleNamespace(Table=lambda name: registry))
+    
+    namespace = {}
+    exec(compile(inline_code(TEMPLATE, 'S3ProcessorFunction'), TEMPLATE, 'exec'), namespace)
+    return types.SimpleNamespace(**namespace)
+
+
+def test_claim_respects_a_renewed_glue_lease(pipeline, registry):
+    old = (datetime.now() - timedelta(hours=3)).isoformat()
+    registry.put_item(Item={'id': 'hash#abc', 'status': 'processing', 'job_run_id': 'jr_glue', 'claimed_at': old,
+                            'lease_expires_at': (datetime.now() + timedelta(minutes=10)).isoformat()})
+    
+    assert not pipeline.claim_file(registry, 'abc', 'a.csv', 'req-1')[0]
+    
+    registry.items['hash#abc']['lease_expires_at'] = (datetime.now() - timedelta(seconds=1)).isoformat()
+    assert pipeline.claim_file(registry, 'abc', 'a.csv', 'req-1')[0]
+    assert registry.items['hash#abc']['job_run_id'] == 'req-1'
+
+
+def test_completed_content_is_not_claimed(pipeline, registry):
+    assert pipeline.claim_file(registry, 'abc', 'a.csv', 'req-1') == (True, None)
+    pipeline.release_file_claim(registry, 'abc', 'req-1', 'completed', 5)
+    
+    claimed, existing = pipeline.claim_file(registry, 'abc', 'b.csv', 'req-2')
+    
+    assert not claimed and existing['records_processed'] == 5
+
+
+def test_claim_is_released_when_processing_raises(pipeline, registry):
+    pipeline.s3.objects['bad.csv'] = b'name,email\n\xff\xfe,x\n'
+    event = {'Records': [{'s3': {'bucket': {'name': 'uploads'}, 'object': {'key': 'bad.csv'}}}]}
+    
+    response = pipeline.lambda_handler(event, types.SimpleNamespace(aws_request_id='req-1'))
+    
+    assert response['statusCode'] == 500, json.loads(response['body'])
+    (claim,) = registry.items.values()
+    assert claim['status'] == 'failed' and claim['job_run_id'] == 'req-1'
\ No newline at end of file
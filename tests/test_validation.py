@@ -0,0 +1,63 @@
+"""
+Columnar validate_frame must report exactly what per-row validate_row does
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.customer import CustomerModel
+from models.project import ProjectModel
+
+CUSTOMERS = pd.DataFrame({
+    'name': ['Ada Lovelace', '', None, '  ', 'Grace Hopper', np.nan, 'Alan Turing', 'Edsger'],
+    'email': ['ada@example.com', 'bad-email', 'x@y.io', None, ' grace@navy.mil ', 'a@b', 'no at.com', ''],
+    'signupDate': ['2024-01-31', '2024-02-30', '31/01/2024', None, '2024-03-01T10:00:00', '', 'soon', '2023-12-01'],
+    'phone': ['+1 (555) 123-4567', '123', None, '555.123.4567', 'abc', '+44 20 7946 0958', '', '12345678901234567'],
+    'companyName': ['Acme', None, '', 'Initech', 'Navy', 'X', 'Bletchley', None],
+}, index=range(100, 108))
+
+PROJECTS = pd.DataFrame({
+    'name': ['Apollo', 'Gemini', '', None, 'Mercury', 'Skylab'],
+    'description': ['Moon', None, '', 'x', 'y', 'z'],
+    'startDate': ['2024-01-01', '2024-05-01', 'bad', None, '2024-13-01', '2024-06-01'],
+    'endDate': ['2024-12-31', '2024-04-01', '2024-01-01', '', '2024-02-01', '2024-06-01'],
+    'status': ['active', 'done', None, '', 'x', 'y'],
+    'budget': ['1,000,000', '12.5', 'lots', None, '-.5', '1,00'],
+    'customerId': ['c1', None, '', 'c4', 'c5', 'c6'],
+})
+
+
+def per_row_errors(model, df):
+    errors = {}
+    for index, row in df.iterrows():
+        row_errors = model.validate_row(row)
+        if row_errors:
+            errors[index] = row_errors
+    return errors
+
+
+@pytest.mark.parametrize('model, df', [(CustomerModel(), CUSTOMERS), (ProjectModel(), PROJECTS)],
+                         ids=['customer', 'project'])
+def test_validate_frame_matches_validate_row(model, df):
+    error_mask, errors = model.validate_frame(df)
+    
+    assert errors == per_row_errors(model, df)
+    assert error_mask.tolist() == [index in errors for index in df.index]
+
+
+def test_validate_frame_matches_validate_row_for_numeric_columns():
+    model = ProjectModel()
+    df = pd.DataFrame({'name': ['a', 'b', None], 'budget': [10.0, np.nan, -3.25]})
+    
+    assert model.validate_frame(df)[1] == per_row_errors(model, df)
+
+
+def test_validate_frame_reports_missing_required_columns():
+    model = CustomerModel()
+    df = pd.DataFrame({'phone': ['5551234567', 'x']})
+    
+    _, errors = model.validate_frame(df)
+    
+    assert errors == per_row_errors(model, df)
+    assert all("Required field 'name' is missing or empty" in messages for messages in errors.values())
\ No newline at end of file
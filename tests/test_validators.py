@@ -0,0 +1,43 @@
+"""
+Compiled field validators: the column-wise mask must agree with the per-value check
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.customer import CustomerModel
+from models.project import ProjectModel
+from models.validators import FieldValidator, compile_schema
+
+
+@pytest.mark.parametrize('field_type, values', [
+    ('email', ['a@b.co', ' a@b.co ', 'a@b', 'a b@c.d', 'a@@b.c', '', None, 5]),
+    ('phone', ['5551234567', '+1 (555) 123-4567', '555-1234', '1' * 16, 'phone', 5551234567]),
+    ('number', ['1', '-1.5', '1,234,567.89', '1,23', '.5', '-.5', 'abc', 3.0, np.nan]),
+    ('date', ['2024-02-29', '2023-02-29', '2024-01-01 12:00', '2024-1-1', 'x', None]),
+])
+def test_invalid_mask_matches_is_valid(field_type, values):
+    validator = FieldValidator('field', field_type)
+    column = pd.Series(values, dtype=object)
+    
+    expected = [not pd.isna(value) and str(value).strip() != '' and not validator.is_valid(value)
+                for value in values]
+    
+    assert validator.invalid_mask(column).tolist() == expected
+
+
+def test_compile_schema_skips_untyped_fields():
+    validators = compile_schema({
+        'email': {'type': 'email'},
+        'name': {'type': 'string'},
+        'budget': {'type': 'number'},
+        'note': {}
+    })
+    
+    assert [(validator.field, validator.type) for validator in validators] == [('email', 'email'), ('budget', 'number')]
+
+
+def test_models_compile_their_typed_fields():
+    assert [v.field for v in CustomerModel().field_validators] == ['email', 'signupDate', 'phone']
+    assert [v.field for v in ProjectModel().field_validators] == ['startDate', 'endDate', 'budget']
\ No newline at end of file